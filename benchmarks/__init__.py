@@ -0,0 +1 @@
+"""Benchmarks of the archive's operations on generated archives"""
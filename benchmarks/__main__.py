@@ -0,0 +1,185 @@
+"""
+Times the archive's operations on generated archives and prints the results as JSON.
+The benchmarks reset the configured archive, so they only run with --reset, unless they
+run on a SQLite file given with --sqlite or in memory with --memory.
+"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import asdict, fields
+from datetime import datetime, timezone
+from json import dumps
+from platform import python_version
+from statistics import median
+from time import perf_counter
+from typing import Any, TypeVar, get_args
+
+from src.analyzer import Engine
+from src.archive import Archive
+from src.backends import Backend, Memory, SQLite
+from src.graph import OrderConflict
+
+from .generator import Parameters, generate
+
+Result = TypeVar('Result')
+
+
+class Timer:
+    """Collects the durations of operations"""
+
+    durations: defaultdict[str, list[float]]
+
+    def __init__(self) -> None:
+        self.durations = defaultdict(list)
+
+    def measure(
+        self, operation: str, function: Callable[..., Result], *args: Any
+    ) -> Result:
+        """
+        Calls a function and records its duration
+        :param operation: The name to record the duration under
+        :param function: The function to call
+        :param args: The arguments to call the function with
+        :return: The function's result
+        """
+
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.durations[operation].append(perf_counter() - start)
+
+    def summary(self) -> dict[str, dict[str, float | int]]:
+        """
+        :return: The durations of each operation in seconds, in the form of
+            {operation: {'count': count, 'total': total, 'mean': mean, ...}}
+        """
+
+        return {
+            operation: {
+                'count': len(durations),
+                'total': sum(durations),
+                'mean': sum(durations) / len(durations),
+                'median': median(durations),
+                'min': min(durations),
+                'max': max(durations),
+            }
+            for operation, durations in self.durations.items()
+        }
+
+
+def benchmark(
+    parameters: Parameters, engine: Engine, repeat: int, backend: Backend | None = None
+) -> dict[str, dict[str, float | int]]:
+    """
+    Generates an archive and times its operations
+    :param parameters: The size of the archive
+    :param engine: The analysis engine to use
+    :param repeat: How many times to repeat each query, and how many axes to fetch
+    :param backend: The backend to store the archive in, the configured MariaDB by default
+    :return: The summary of the durations, see `Timer.summary`
+    """
+
+    archive = Archive(backend=backend)
+    archive.connect()
+    archive.reset()
+
+    timer = Timer()
+
+    try:
+        generated = generate(archive, parameters)
+        archive.commit()
+
+        for document, large, small in generated.orders:
+            try:
+                timer.measure('declare_order', document.declare_order, large, small)
+            except OrderConflict:
+                pass
+        archive.commit()
+
+        timer.measure('analyze_rules', archive.analyze_rules, engine)
+        archive.commit()
+
+        axes = archive.get_axes()[:repeat]
+
+        for _ in range(repeat):
+            for axis in axes:
+                timer.measure('get_axis', archive.get_axis, axis)
+            timer.measure('get_points', archive.get_points)
+            timer.measure('get_elements', archive.get_elements)
+            for document in generated.documents:
+                timer.measure('Document.get_orders', document.get_orders)
+    finally:
+        archive.close()
+
+    return timer.summary()
+
+
+def main() -> None:
+    """Parses the arguments, runs the benchmarks and outputs the results"""
+
+    parser = ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    for field in fields(Parameters):
+        parser.add_argument(
+            f'--{field.name.replace("_", "-")}', type=int, default=field.default
+        )
+    parser.add_argument(
+        '--engine',
+        action='append',
+        choices=get_args(Engine),
+        help='an analysis engine to benchmark, can be repeated (default: sequential)',
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='a file to write to instead of stdout')
+    store = parser.add_mutually_exclusive_group()
+    store.add_argument(
+        '--sqlite', help='a SQLite file to store the archive in instead of MariaDB'
+    )
+    store.add_argument(
+        '--memory', action='store_true', help='keep the archive in memory instead'
+    )
+    parser.add_argument(
+        '--reset', action='store_true', help='confirm resetting the configured archive'
+    )
+
+    arguments = parser.parse_args()
+
+    if not (arguments.reset or arguments.sqlite or arguments.memory):
+        parser.error('the benchmarks reset the configured archive, pass --reset')
+
+    backend: Backend | None = None
+    if arguments.sqlite:
+        backend = SQLite(arguments.sqlite)
+    elif arguments.memory:
+        backend = Memory()
+
+    parameters = Parameters(
+        **{field.name: getattr(arguments, field.name) for field in fields(Parameters)}
+    )
+
+    results = dumps(
+        {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': python_version(),
+            'parameters': asdict(parameters),
+            'backend': type(backend).__name__ if backend else 'MariaDB',
+            'engines': {
+                engine: benchmark(parameters, engine, arguments.repeat, backend)
+                for engine in arguments.engine or ['sequential']
+            },
+        },
+        indent=4,
+    )
+
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            file.write(results + '\n')
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Generates synthetic archives for benchmarks"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from random import Random
+
+from src.archive import Archive, Category, Document, Point
+
+
+@dataclass
+class Parameters:
+    """The size of a generated archive"""
+
+    seed: int = 0
+    categories: int = 5
+    properties: int = 4
+    order_rules: int = 3
+    elements: int = 200
+    documents: int = 10
+    orders: int = 500
+
+    def __post_init__(self) -> None:
+        assert self.properties > self.order_rules >= 0
+        assert self.categories > 0 and self.elements > 0 and self.documents > 0
+
+
+@dataclass
+class Generated:
+    """The parts of a generated archive the benchmarks work on"""
+
+    documents: list[Document]
+    orders: list[tuple[Document, Point, Point]]
+
+
+def _index(name: str) -> int:
+    """
+    :param name: A generated name
+    :return: The index in the name
+    """
+
+    return int(name.rsplit(' ', 1)[-1])
+
+
+def _add_categories(archive: Archive, parameters: Parameters) -> list[Category]:
+    """
+    Adds categories whose properties are each larger than the one before, as far as there
+    are order rules
+    :param archive: The archive to fill
+    :param parameters: The size of the archive
+    :return: The new categories
+    """
+
+    categories = []
+    for index in range(parameters.categories):
+        category = archive.new_category(f'Category {index}')
+        properties = [
+            category.new_property(f'Property {index}')
+            for index in range(parameters.properties)
+        ]
+        for small, large in zip(properties, properties[1 : parameters.order_rules + 1]):
+            archive.add_order_rule(large, small)
+        categories.append(category)
+
+    return categories
+
+
+def _pick_orders(
+    random: Random, moments: dict[int, float], amount: int
+) -> list[tuple[int, int]]:
+    """
+    Picks distinct pairs of points, ordered by their moments
+    :param random: The random generator
+    :param moments: The points' moments, in the form of {point: moment}
+    :param amount: The amount of pairs to pick, as far as there are enough points
+    :return: A sorted list of pairs, each in the form of (large, small)
+    """
+
+    points = sorted(moments)
+    pairs: set[tuple[int, int]] = set()
+    while len(pairs) < min(amount, len(points) * (len(points) - 1) // 2):
+        small, large = sorted(random.sample(points, 2), key=moments.__getitem__)
+        pairs.add((large, small))
+
+    return sorted(pairs)
+
+
+def generate(archive: Archive, parameters: Parameters) -> Generated:
+    """
+    Fills an empty archive with categories, properties, order rules, elements, documents and
+    descriptions, and picks orders to declare.
+    Every element spans a random period, and each property of its category is a moment in
+    it, later properties being larger. The orders and the order rules follow these moments,
+    so they never contradict each other.
+    :param archive: The archive to fill
+    :param parameters: The size of the archive
+    :return: The archive's documents and the orders to declare, each in the form of
+        (document, large, small)
+    """
+
+    random = Random(parameters.seed)
+
+    categories = _add_categories(archive, parameters)
+
+    documents = [
+        archive.new_document(f'Document {index}')
+        for index in range(parameters.documents)
+    ]
+
+    # Each element is described once, by the name of its period
+    periods = {}
+    for index in range(parameters.elements):
+        element = archive.new_element(random.choice(categories))
+        random.choice(documents).declare_description(element, f'Element {index}')
+        periods[f'Element {index}'] = (random.uniform(0, 100), random.uniform(0.1, 10))
+
+    moments = {}
+    for point in archive.get_points():
+        (description,) = point['descriptions']
+        start, length = periods[str(description)]
+        moments[point['id']] = start + _index(str(point['property'])) * length
+
+    return Generated(
+        documents,
+        [
+            (random.choice(documents), archive.point(large), archive.point(small))
+            for large, small in _pick_orders(random, moments, parameters.orders)
+        ],
+    )
@@ -1,6 +1,6 @@
 """Page to add a description to an element"""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 
 from server.client import send
 
@@ -16,11 +16,19 @@ def show(document_id: int) -> str:
     :return: The add description page's HTML
     """
 
-    document_details = send({'message': 'get_document_and_elements', 'id': document_id})
+    document_details = send(
+        {
+            'message': 'get_document_and_elements',
+            'id': document_id,
+            'token': request.args.get('page'),
+        }
+    )
 
     return render_template(
         'add_description.html',
         document_id=document_id,
-        document_name=document_details['name'],
-        elements=document_details['elements'],
+        document_name=document_details.get('name', ''),
+        elements=document_details.get('elements', []),
+        next=document_details.get('next'),
+        error=document_details.get('error'),
     )
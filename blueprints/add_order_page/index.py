@@ -1,6 +1,6 @@
 """Page to add an order to a document"""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 
 from server.client import send
 
@@ -14,11 +14,19 @@ def show(document_id: int) -> str:
     :return: The add order page's HTML
     """
 
-    document_details = send({'message': 'get_document_and_points', 'id': document_id})
+    document_details = send(
+        {
+            'message': 'get_document_and_points',
+            'id': document_id,
+            'token': request.args.get('page'),
+        }
+    )
 
     return render_template(
         'add_order.html',
         document_id=document_id,
-        document_name=document_details['name'],
-        points=document_details['points'],
+        document_name=document_details.get('name', ''),
+        points=document_details.get('points', []),
+        next=document_details.get('next'),
+        error=document_details.get('error'),
     )
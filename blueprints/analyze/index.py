@@ -16,6 +16,10 @@ def post() -> dict[str, bool]:
 
     return {
         'success': send(
-            {'message': 'analyze', 'password': request.cookies['password']}
+            {
+                'message': 'analyze',
+                'password': request.cookies['password'],
+                'engine': request.json.get('engine', 'sequential'),
+            }
         )['success']
     }
@@ -1,6 +1,6 @@
 """An axis's page"""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 
 from server.client import send
 
@@ -17,5 +17,7 @@ def show(axis_id: int) -> str:
     return render_template(
         'axis.html',
         id=axis_id,
-        points=send({'message': 'get_axis', 'id': axis_id})['points'],
+        points=send(
+            {'message': 'get_axis', 'id': axis_id, 'route': request.args.get('route')}
+        )['points'],
     )
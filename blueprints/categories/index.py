@@ -1,6 +1,6 @@
 """The website's main page"""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 
 from server.client import send
 
@@ -11,6 +11,11 @@ categories = Blueprint('categories', __name__, template_folder='templates')
 def show() -> str:
     """:return: The categories page HTML"""
 
+    page = send({'message': 'get_categories', 'token': request.args.get('page')})
+
     return render_template(
-        'categories.html', categories=send({'message': 'get_categories'})['categories']
+        'categories.html',
+        categories=page.get('categories', []),
+        next=page.get('next'),
+        error=page.get('error'),
     )
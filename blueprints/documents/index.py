@@ -1,6 +1,6 @@
 """The website's documents page"""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 
 from server.client import send
 
@@ -11,6 +11,11 @@ documents = Blueprint('documents', __name__, template_folder='templates')
 def show() -> str:
     """:return: The documents page HTML"""
 
+    page = send({'message': 'get_documents', 'token': request.args.get('page')})
+
     return render_template(
-        'documents.html', documents=send({'message': 'get_documents'})['documents']
+        'documents.html',
+        documents=page.get('documents', []),
+        next=page.get('next'),
+        error=page.get('error'),
     )
@@ -1,6 +1,6 @@
 """A category's elements page"""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request
 
 from server.client import send
 
@@ -14,11 +14,20 @@ def show(category_id: int) -> str:
     :return: The category elements page HTML
     """
 
-    category_details = send({'message': 'get_category_and_elements', 'id': category_id})
+    category_details = send(
+        {
+            'message': 'get_category_and_elements',
+            'id': category_id,
+            'route': request.args.get('route'),
+            'token': request.args.get('page'),
+        }
+    )
 
     return render_template(
         'elements.html',
         category_id=category_id,
-        name=category_details['name'],
-        elements=category_details['elements'],
+        name=category_details.get('name', ''),
+        elements=category_details.get('elements', []),
+        next=category_details.get('next'),
+        error=category_details.get('error'),
     )
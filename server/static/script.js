@@ -161,6 +161,12 @@ $('#guest-button').click(() => {
     location.replace('/archive')
 })
 
+$('#next-page').click((event) => {
+    const url = new URL(location.href)
+    url.searchParams.set('page', event.currentTarget.value)
+    location.replace(url)
+})
+
 $('#view-add-category').click(() => {
     location.replace('/add-category-page')
 })
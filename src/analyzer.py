@@ -1,22 +1,119 @@
 """Data analyzing of the archive"""
+
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from itertools import repeat
 from typing import TYPE_CHECKING, Literal
 
+from .axis import LARGEST_VALUE, Axis
 from .cells import Axis as _Axis
-from .cells import Boolean, Point, UnsignedInt
+from .cells import Boolean, Element, Point, UnsignedInt
+from .graph import Chains, DisjointSets, OrderConflict, Topology
 
 if TYPE_CHECKING:
+    from .backends import Backend
     from .database import Database
 
-LARGEST_VALUE = 2**32 - 1
+INSERT_CHUNK = 1000
+PARALLEL_TASKS = 64
+
+Engine = Literal['sequential', 'memory', 'parallel', 'sql']
+
+# Builds the chains of the checked orders in analysis_orders and of the axes they touch,
+# an axis standing for a link from its largest to its smallest point. Chains only run
+# through points with one larger and one smaller link, listed from the largest point with
+# each link's axis. The orders agree with the axes, so no chain visits a point twice.
+CHAINS_QUERY = f'''
+WITH RECURSIVE pending AS (
+    SELECT large, small FROM analysis_orders
+), spans AS (
+    SELECT largest.point AS large, smallest.point AS small, largest.axis AS axis
+    FROM analysis AS largest JOIN analysis AS smallest ON smallest.axis = largest.axis
+    WHERE largest.value = {LARGEST_VALUE} AND smallest.value = 0
+    AND largest.axis IN (
+        SELECT axis FROM analysis
+        WHERE value IN (0, {LARGEST_VALUE})
+        AND point IN (SELECT large FROM pending UNION SELECT small FROM pending)
+    )
+), links AS (
+    SELECT large, small, NULL AS axis FROM pending
+    UNION ALL SELECT large, small, axis FROM spans
+), degrees AS (
+    SELECT point, SUM(smaller) AS smaller, SUM(larger) AS larger
+    FROM (
+        SELECT large AS point, 1 AS smaller, 0 AS larger FROM links
+        UNION ALL SELECT small, 0, 1 FROM links
+    ) AS ends
+    GROUP BY point
+), continued_links AS (
+    SELECT links.*, degrees.smaller = 1 AND degrees.larger = 1 AS continued
+    FROM links JOIN degrees ON degrees.point = links.large
+), starts AS (
+    SELECT ROW_NUMBER() OVER (ORDER BY large, small) AS chain, large, small, axis
+    FROM continued_links WHERE NOT continued
+), walk AS (
+    SELECT chain, 0 AS step, large AS point, small AS following, axis FROM starts
+    UNION ALL
+    SELECT walk.chain, walk.step + 1, walk.following, next.small, next.axis
+    FROM walk LEFT JOIN continued_links AS next
+    ON next.large = walk.following AND next.continued
+    WHERE walk.following IS NOT NULL
+), members AS (
+    SELECT chain, step, point, {LARGEST_VALUE} AS value, axis FROM walk
+    UNION ALL
+    SELECT walk.chain, walk.step, analysis.point, analysis.value, walk.axis
+    FROM walk JOIN analysis ON analysis.axis = walk.axis
+    WHERE analysis.value NOT IN (0, {LARGEST_VALUE})
+)
+SELECT
+    chain,
+    ROW_NUMBER() OVER (PARTITION BY chain ORDER BY step, value DESC) - 1,
+    COUNT(*) OVER (PARTITION BY chain),
+    point,
+    axis
+FROM members
+'''
+
+
+def _analyze_component(
+    database_type: type[Database], backend: Backend, orders: list[dict[str, Point]]
+) -> Chains:
+    """
+    Analyzes orders in memory in a worker process, using a new connection
+    :param database_type: The archive's database class, since the database imports this module
+    :param backend: The backend that stores the archive
+    :param orders: The orders to analyze, each in the form of {'large': point, 'small': point}
+    :return: The resulting chains
+    """
+
+    database = database_type(pool_size=1, backend=backend)
+    database.connect()
+
+    try:
+        return database.analyzer.load_chains(orders)
+    finally:
+        database.close()
+
+
+def spread(amount: int) -> list[int]:
+    """
+    Spreads values evenly across an axis, from 0 to the largest value
+    :param amount: The amount of values, at least 2
+    :return: A list of ascending values
+    """
+
+    return [LARGEST_VALUE * index // (amount - 1) for index in range(amount)]
 
 
 class Analyzer:
     """Analyzes an archive"""
 
     _database: Database
+    _orders_added: int
+    _topology: Topology | None
 
     def __init__(self, database: Database) -> None:
         """
@@ -25,6 +122,8 @@ class Analyzer:
         """
 
         self._database = database
+        self._orders_added = 0
+        self._topology = None
 
     def _add_axis(self, large: Point, small: Point) -> None:
         """
@@ -35,6 +134,7 @@ class Analyzer:
 
         self._database['axes'].insert().execute()
         axis = _Axis(self._database.last_row_id)
+        self._touch(axis.value)
 
         self._database['analysis'].insert_many(
             ('point', 'axis', 'value'),
@@ -42,129 +142,143 @@ class Analyzer:
             (small, axis, UnsignedInt(0)),
         ).execute()
 
-    def _axis(self, identifier: int) -> Axis:
+    def _add_known_order(self, large: int, small: int) -> None:
         """
-        Creates an axis object to access an axis
-        :param identifier: The axis's numeral ID
-        :return: An axis object
+        Adds an order to the topology of the analyzed points
+        :param large: The larger point
+        :param small: The smaller point
+        :raise OrderConflict: If the order contradicts the known orders, left unchanged
         """
 
-        return Axis(self._database, identifier)
+        self._known_orders().add(large, small)
+        self._orders_added += 1
 
-    def _remove_useless_axes(self) -> None:
-        """Removes axes that add no new information"""
-
-        axis_couples: list[tuple[int, int]] = [
-            (couple['small1.axis'], couple['small2.axis'])
-            for couple in self._database.table_references(
-                'analysis AS small1',
-                'analysis AS small2',
-                'analysis AS large1',
-                'analysis AS large2',
-            )
-            .select('small1.axis', 'small2.axis')
-            .where(
-                **{
-                    'small1.axis': 'large1.axis',
-                    'small2.axis': 'large2.axis',
-                    'large1.axis': '!large2.axis',
-                    'small1.point': 'small2.point',
-                    'large1.point': 'large2.point',
-                    'small1.value': UnsignedInt(0),
-                    'large1.value': UnsignedInt(4294967295),
-                    'small2.value': UnsignedInt(0),
-                    'large2.value': UnsignedInt(4294967295),
-                }
-            )
-            .execute()
-        ]
+    def _analyze_in_parallel(self, orders: list[dict[str, Point]]) -> list[Chains]:
+        """
+        Splits a list of orders by the connected components of their points and axes, and
+        analyzes the components in a process pool, each worker with its own connection.
+        Falls back to this process if workers cannot connect or see uncommitted changes.
+        :param orders: The orders to analyze, each in the form of {'large': point, 'small': point}
+        :return: The resulting chains of each worker
+        """
 
-        if not axis_couples:
-            return
+        if not orders:
+            return []
 
-        tiny_axes: set[int] = {
-            row['axis']
-            for row in self._database['analysis']
-            .select('axis', 'COUNT(*)')
+        if not self._database.backend.multiprocess or self._database.uncommitted:
+            return [self.load_chains(orders)]
+
+        components: DisjointSets[int] = DisjointSets()
+
+        for order in orders:
+            components.union(order['large'].value, order['small'].value)
+
+        # Axes are keyed by their negated IDs, to keep them apart from points
+        for row in (
+            self._database['analysis']
+            .select('axis', 'point')
             .where(
-                axis=tuple(_Axis(id) for id in {couple[0] for couple in axis_couples})
+                point=tuple(Point(point) for point in components),
+                value=(UnsignedInt(0), UnsignedInt(LARGEST_VALUE)),
             )
-            .group_by('axis')
             .execute()
-            if row['COUNT(*)'] == 2
-        }
+        ):
+            components.union(row['point'], -row['axis'])
 
-        useless_couples = [
-            couple
-            for couple in axis_couples
-            if couple[0] in tiny_axes and couple[1] not in tiny_axes
-        ]
+        groups: defaultdict[int, list[dict[str, Point]]] = defaultdict(list)
+        for order in orders:
+            groups[components.find(order['large'].value)].append(order)
 
-        other_useless_couples = [
-            couple
-            for couple in axis_couples
-            if couple[0] in tiny_axes and couple[1] in tiny_axes
+        tasks: list[list[dict[str, Point]]] = [
+            [] for _ in range(min(len(groups), PARALLEL_TASKS))
         ]
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(tasks, key=len).extend(group)
+
+        with ProcessPoolExecutor() as executor:
+            return list(
+                executor.map(
+                    _analyze_component,
+                    repeat(type(self._database)),
+                    repeat(self._database.backend),
+                    tasks,
+                )
+            )
 
-        for couple in other_useless_couples:
-            if (couple[1], couple[0]) in other_useless_couples:
-                other_useless_couples.remove(couple)
-
-        useless_axes = tuple(
-            _Axis(couple[0]) for couple in (useless_couples + other_useless_couples)
-        )
-
-        self._database['analysis'].delete().where(axis=useless_axes).execute()
-        self._database['axes'].delete().where(id=useless_axes).execute()
-
-    def _unanalyzed_orders(self) -> list[dict[str, Point]]:
+    def _analyze_in_sql(self, orders: list[dict[str, Point]]) -> None:
         """
-        Fetches the order_rules ordering of unanalyzed points
-        :return: A list of unanalyzed orders, each in the form of {'large': point, 'small': Point}
+        Analyzes already checked orders inside the database, in a fixed amount of statements
+        besides the chunks the orders and new axes are inserted in.
+        The touched axes are rebuilt along the chains as new axes.
+        :param orders: The orders to analyze, each in the form of {'large': point, 'small': point}
         """
 
-        results = (
-            self._database.table_references(
-                'points AS large', 'points AS small', 'order_rules'
-            )
-            .select('large.id', 'small.id')
-            .where(
-                **{
-                    'large.analyzed': Boolean(False),
-                    'small.analyzed': Boolean(False),
-                    'order_rules.analyzed': Boolean(True),
-                    'large.element': 'small.element',
-                    'large.property': 'order_rules.large',
-                    'small.property': 'order_rules.small',
-                }
-            )
-            .execute()
-        )
+        if not orders:
+            return
 
-        results.extend(
-            self._database.table_references(
-                'points AS large', 'points AS small', 'order_rules'
-            )
-            .select('large.id', 'small.id')
-            .where(
-                **{
-                    'order_rules.analyzed': Boolean(False),
-                    'large.element': 'small.element',
-                    'large.property': 'order_rules.large',
-                    'small.property': 'order_rules.small',
-                }
-            )
-            .execute()
-        )
+        temporary_tables = {
+            'analysis_orders': 'large INT UNSIGNED NOT NULL, small INT UNSIGNED NOT NULL',
+            'analysis_chains': 'chain INT UNSIGNED NOT NULL, place INT UNSIGNED NOT NULL, '
+            'size INT UNSIGNED NOT NULL, point INT UNSIGNED NOT NULL, axis INT UNSIGNED',
+            'chain_axes': 'chain INT UNSIGNED NOT NULL, axis INT UNSIGNED NOT NULL',
+        }
 
-        return [
-            {'large': Point(points['large.id']), 'small': Point(points['small.id'])}
-            for points in results
-        ]
+        for table, columns in temporary_tables.items():
+            self._database.statement(
+                f'CREATE TEMPORARY TABLE {table} ({columns})'
+            ).execute()
+
+        try:
+            rows = [(order['large'], order['small']) for order in orders]
+            for start in range(0, len(rows), INSERT_CHUNK):
+                self._database.table('analysis_orders').insert_many(
+                    ('large', 'small'), *rows[start : start + INSERT_CHUNK]
+                ).execute()
+
+            self._database.statement(
+                'INSERT INTO analysis_chains (chain, place, size, point, axis)'
+                + CHAINS_QUERY
+            ).execute()
+
+            ((amount,),) = (
+                self._database.table_references('analysis_chains')
+                .select('COUNT(*)')
+                .where(place=UnsignedInt(0))
+                .execute_tuples()
+            )
 
-    def analyze_order(self, large: Point, small: Point) -> None:
+            for table, column in (('analysis', 'axis'), ('axes', 'id')):
+                self._database.statement(
+                    f'DELETE FROM {table} WHERE {column} IN '
+                    '(SELECT axis FROM analysis_chains WHERE axis IS NOT NULL)'
+                ).execute()
+
+            # Chains are numbered from 1, and each gets an axis of its own
+            axes = self._database['axes'].insert_chunks((), (() for _ in range(amount)))
+            rows = [
+                (UnsignedInt(chain), _Axis(axis)) for chain, axis in enumerate(axes, 1)
+            ]
+            for start in range(0, len(rows), INSERT_CHUNK):
+                self._database.table('chain_axes').insert_many(
+                    ('chain', 'axis'), *rows[start : start + INSERT_CHUNK]
+                ).execute()
+
+            self._database.table_references('analysis_chains', 'chain_axes').select(
+                'analysis_chains.point',
+                'chain_axes.axis',
+                f'{LARGEST_VALUE} * (size - 1 - place) DIV (size - 1)',
+            ).where(**{'analysis_chains.chain': 'chain_axes.chain'}).into(
+                'analysis', ('point', 'axis', 'value')
+            ).execute()
+
+            self._touch(*axes)
+        finally:
+            for table in temporary_tables:
+                self._database.statement(f'DROP TEMPORARY TABLE {table}').execute()
+
+    def _apply_order(self, large: Point, small: Point) -> None:
         """
-        Analyzes two points with a known order and saves the results in analysis
+        Saves the results of an already checked order in analysis
         :param large: The larger point
         :param small: The smaller point
         """
@@ -176,153 +290,427 @@ class Analyzer:
                 {'point': large, 'value': UnsignedInt(0)},
                 {'point': small, 'value': UnsignedInt(LARGEST_VALUE)},
             )
-            .execute()
+            .execute_tuples()
         )
 
-        large_matches = [match for match in matches if match['point'] == large.value]
-        small_matches = [match for match in matches if match['point'] == small.value]
+        large_matches = [axis for axis, point in matches if point == large.value]
+        small_matches = [axis for axis, point in matches if point == small.value]
 
         if len(large_matches) == len(small_matches) == 1:
-            self._axis(small_matches[0]['axis']).join(
-                self._axis(large_matches[0]['axis'])
-            )
+            axis = self._axis(small_matches[0]).join(self._axis(large_matches[0]))
+            self._touch(axis.id.value)
 
         elif len(large_matches) == 1:
-            self._axis(large_matches[0]['axis']).add_before(small)
+            self._axis(large_matches[0]).add_before(small)
+            self._touch(large_matches[0])
 
         elif len(small_matches) == 1:
-            self._axis(small_matches[0]['axis']).add_after(large)
+            self._axis(small_matches[0]).add_after(large)
+            self._touch(small_matches[0])
 
         else:
             self._add_axis(large, small)
 
-    def analyze_rules(self) -> None:
+    def _axis(self, identifier: int) -> Axis:
         """
-        Analyzes the unanalyzed points according to order_rules and saves the results in analysis
+        Creates an axis object to access an axis
+        :param identifier: The axis's numeral ID
+        :return: An axis object
         """
 
-        for order in self._unanalyzed_orders():
-            self.analyze_order(**order)
+        return Axis(self._database, identifier)
 
-        self._remove_useless_axes()
+    def _known_orders(self) -> Topology:
+        """
+        Fetches the topological order of the analyzed points, loading it on first use
+        :return: The points' topology
+        """
 
-        self._database['points'].set(analyzed=Boolean(True)).where(
-            analyzed=Boolean(False)
-        ).execute()
+        if self._topology is None:
+            self._topology = Topology()
+            previous: dict[int, int] = {}
 
-        self._database['order_rules'].set(analyzed=Boolean(True)).where(
-            analyzed=Boolean(False)
-        ).execute()
+            for axis, point in (
+                self._database['analysis']
+                .select('axis', 'point')
+                .order_by('value', descending=True)
+                .execute_tuples()
+            ):
+                if axis in previous:
+                    with suppress(OrderConflict):
+                        self._topology.add(previous[axis], point)
+                previous[axis] = point
 
+        return self._topology
 
-class Axis:
-    """Allows access to an axis"""
+    def _remove_useless_axes(self) -> None:
+        """
+        Removes axes that add no new information, out of the axes touched since the last
+        removal. An axis of only two points is useless if another axis shares its smallest
+        and largest points.
+        """
 
-    _database: Database
-    id: _Axis
+        touched_axes = {
+            axis
+            for (axis,) in self._database['touched_axes']
+            .select('axis')
+            .execute_tuples()
+        }
 
-    def __init__(self, database: Database, identifier: int) -> None:
-        self._database = database
-        self.id = _Axis(identifier)
+        if not touched_axes:
+            return
+
+        self._database['touched_axes'].delete().execute()
+
+        ends = [
+            Point(row['point'])
+            for row in self._database['analysis']
+            .select('point')
+            .where(
+                axis=tuple(_Axis(axis) for axis in touched_axes),
+                value=(UnsignedInt(0), UnsignedInt(LARGEST_VALUE)),
+            )
+            .execute()
+        ]
+
+        if not ends:
+            return
+
+        axis_ends: defaultdict[int, dict[int, int]] = defaultdict(dict)
+
+        for row in (
+            self._database['analysis']
+            .select('axis', 'point', 'value')
+            .where(
+                point=tuple(ends), value=(UnsignedInt(0), UnsignedInt(LARGEST_VALUE))
+            )
+            .execute()
+        ):
+            axis_ends[row['axis']][row['value']] = row['point']
 
-    def _add_point(self, point: Point, value: int) -> None:
+        axes_by_ends: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+
+        for axis, points in axis_ends.items():
+            if len(points) == 2:
+                axes_by_ends[points[0], points[LARGEST_VALUE]].append(axis)
+
+        groups = [axes for axes in axes_by_ends.values() if len(axes) > 1]
+
+        if not groups:
+            return
+
+        tiny_axes: set[int] = {
+            row['axis']
+            for row in self._database['analysis']
+            .select('axis', 'COUNT(*)')
+            .where(axis=tuple(_Axis(axis) for axes in groups for axis in axes))
+            .group_by('axis')
+            .execute()
+            if row['COUNT(*)'] == 2
+        }
+
+        useless_axes: list[_Axis] = []
+
+        for axes in groups:
+            tiny_group = sorted(axis for axis in axes if axis in tiny_axes)
+
+            # Keep one of several tiny axes if no larger axis covers them
+            if len(tiny_group) == len(axes):
+                tiny_group.pop(0)
+
+            useless_axes.extend(_Axis(axis) for axis in tiny_group)
+
+        if useless_axes:
+            self._database['analysis'].delete().where(
+                axis=tuple(useless_axes)
+            ).execute()
+            self._database['axes'].delete().where(id=tuple(useless_axes)).execute()
+
+    def _touch(self, *axes: int) -> None:
         """
-        Adds a new point to the axis
-        :param point: The point to add
-        :param value: The point's value within the axis
+        Records axes whose points changed, for `_remove_useless_axes` to check. The record is
+        kept in the database, so it is rolled back along with the changes and outlives the
+        process.
+        :param axes: The IDs of the touched axes
         """
 
-        self._database['analysis'].insert(
-            point=point, axis=self.id, value=UnsignedInt(value)
-        ).execute()
+        rows = [(UnsignedInt(axis),) for axis in axes]
 
-    def _get_points_by_size(
-        self, size: Literal['largest', 'smallest'], amount: int
-    ) -> Generator[dict[str, int], None, None]:
+        for start in range(0, len(rows), INSERT_CHUNK):
+            self._database['touched_axes'].insert_many(
+                ('axis',), *rows[start : start + INSERT_CHUNK]
+            ).execute()
+
+    def _unanalyzed_orders(self) -> list[dict[str, Point]]:
         """
-        Fetches either the largest or smallest points in the axis
-        :param size: Whether should fetch the largest or smallest points
-        :param amount: The amount of points to fetch
-        :return: A list of points, each in the form of {'id': id, 'value': value}
+        Fetches the order_rules ordering of unanalyzed points
+        :return: A list of unanalyzed orders, each in the form of {'large': point, 'small': Point}
         """
 
-        return (
-            {'id': point['id'], 'value': point['value']}
-            for point in self._database['analysis']
-            .select('id', 'value')
-            .where(axis=self.id)
-            .order_by(
-                'value',
-                descending=(size == 'largest'),
+        results: list[tuple[int, int]] = []
+
+        # New points of analyzed rules, and all points of unanalyzed rules
+        for analyzed in (
+            {
+                'large.analyzed': Boolean(False),
+                'small.analyzed': Boolean(False),
+                'order_rules.analyzed': Boolean(True),
+            },
+            {'order_rules.analyzed': Boolean(False)},
+        ):
+            results.extend(
+                self._database.table_references(
+                    'points AS large', 'points AS small', 'order_rules'
+                )
+                .select('large.id', 'small.id')
+                .where(
+                    **analyzed,
+                    **{
+                        'large.element': 'small.element',
+                        'large.property': 'order_rules.large',
+                        'small.property': 'order_rules.small',
+                    },
+                )
+                .execute_tuples()
             )
-            .limit(amount)
-            .execute()
-        )
 
-    def add_after(self, point: Point) -> None:
+        return [
+            {'large': Point(large), 'small': Point(small)} for large, small in results
+        ]
+
+    def _write_chains(self, *results: Chains) -> None:
         """
-        Adds a point after the last point in the axis
-        :param point: The point to add
+        Replaces the analysis of the changed and removed axes with the given chains
+        :param results: Independent sets of chains to write
         """
 
-        largest, second_largest = self._get_points_by_size('largest', 2)
+        removed = set[int]().union(*(chains.removed for chains in results))
+        axis_ids = {
+            (index, key): key
+            for index, chains in enumerate(results)
+            for key in chains.changed
+            if key > 0
+        }
 
-        new_value = (LARGEST_VALUE + second_largest['value']) // 2
+        stale_axes = tuple(_Axis(axis) for axis in removed | set(axis_ids.values()))
 
-        self._database['analysis'].set(value=UnsignedInt(new_value)).where(
-            id=UnsignedInt(largest['id'])
-        ).execute()
+        if stale_axes:
+            self._database['analysis'].delete().where(axis=stale_axes).execute()
+
+        if removed:
+            self._database['axes'].delete().where(
+                id=tuple(_Axis(axis) for axis in removed)
+            ).execute()
+
+        new_keys = [
+            (index, key)
+            for index, chains in enumerate(results)
+            for key in sorted(chains.changed)
+            if key < 0
+        ]
+
+        axis_ids.update(
+            zip(
+                new_keys,
+                self._database['axes'].insert_chunks((), (() for _ in new_keys)),
+            )
+        )
+
+        self._touch(*axis_ids.values())
+
+        rows = [
+            (Point(point), _Axis(axis_ids[index, key]), UnsignedInt(value))
+            for index, chains in enumerate(results)
+            for key in chains.changed
+            for point, value in zip(chains[key], spread(len(chains[key])))
+        ]
 
-        self._add_point(point, LARGEST_VALUE)
+        for start in range(0, len(rows), INSERT_CHUNK):
+            self._database['analysis'].insert_many(
+                ('point', 'axis', 'value'), *rows[start : start + INSERT_CHUNK]
+            ).execute()
 
-    def add_before(self, point: Point) -> None:
+    def analyze_elements(self, elements: tuple[Element, ...]) -> None:
         """
-        Adds a point before the first point in the axis
-        :param point: The point to add
+        Analyzes the points of new elements according to the analyzed order_rules and marks
+        them as analyzed. Orders that contradict the known orders are skipped.
+        :param elements: The new elements
         """
 
-        smallest, second_smallest = self._get_points_by_size('smallest', 2)
+        orders: list[dict[str, Point]] = []
+
+        # Reads that lead to writes must see the latest changes, see `Database.route`
+        with self._database.route('primary'):
+            for large, small in (
+                self._database.table_references(
+                    'points AS large', 'points AS small', 'order_rules'
+                )
+                .select('large.id', 'small.id')
+                .where(
+                    **{
+                        'large.element': elements,
+                        'small.element': 'large.element',
+                        'order_rules.analyzed': Boolean(True),
+                        'large.property': 'order_rules.large',
+                        'small.property': 'order_rules.small',
+                    }
+                )
+                .execute_tuples()
+            ):
+                with suppress(OrderConflict):
+                    self._add_known_order(large, small)
+                    orders.append({'large': Point(large), 'small': Point(small)})
+
+            try:
+                self._write_chains(self.load_chains(orders))
+            except Exception:
+                self._topology = None
+                raise
+
+            self._remove_useless_axes()
+
+            self._database['points'].set(analyzed=Boolean(True)).where(
+                element=elements
+            ).execute()
 
-        new_value = second_smallest['value'] // 2
+    def analyze_order(self, large: Point, small: Point) -> None:
+        """
+        Analyzes two points with a known order and saves the results in analysis
+        :param large: The larger point
+        :param small: The smaller point
+        :raise OrderConflict: If the order contradicts the known orders
+        """
 
-        self._database['analysis'].set(value=UnsignedInt(new_value)).where(
-            id=UnsignedInt(smallest['id'])
-        ).execute()
+        with self._database.route('primary'):
+            self._add_known_order(large.value, small.value)
 
-        self._add_point(point, 0)
+            try:
+                self._apply_order(large, small)
+            except Exception:
+                self._topology = None
+                raise
 
-    def join(self, axis: Axis) -> None:
+    def analyze_rules(self, engine: Engine = 'sequential') -> list[list[int]]:
         """
-        Combines this axis with another axis by appending it after this axis
-        :param axis: The axis to append to this axis
+        Analyzes the unanalyzed points according to order_rules and saves the results in analysis.
+        Orders that contradict the known orders are skipped.
+        :param engine: Either 'sequential' to analyze each order against the database,
+            'memory' to load the affected axes once and write the results back in bulk,
+            'parallel' to do the same per connected component in a process pool, or 'sql'
+            to build the chains of the checked orders inside the database. Parallel
+            analysis falls back to this process while there are uncommitted changes.
+        :return: The chains contradicting the skipped orders, see `OrderConflict.chain`
         """
 
-        largest, second_largest = self._get_points_by_size('largest', 2)
-        new_value = (LARGEST_VALUE + second_largest['value']) // 2
+        conflicts: list[list[int]] = []
+        orders: list[dict[str, Point]] = []
+
+        # Reads that lead to writes must see the latest changes, see `Database.route`
+        with self._database.route('primary'):
+            try:
+                for order in self._unanalyzed_orders():
+                    try:
+                        self._add_known_order(
+                            order['large'].value, order['small'].value
+                        )
+                        orders.append(order)
+                    except OrderConflict as conflict:
+                        conflicts.append(conflict.chain)
+
+                if engine == 'sql':
+                    self._analyze_in_sql(orders)
+                elif engine == 'memory':
+                    self._write_chains(self.load_chains(orders))
+                elif engine == 'parallel':
+                    self._write_chains(*self._analyze_in_parallel(orders))
+                else:
+                    for order in orders:
+                        self._apply_order(**order)
+            except Exception:
+                self._topology = None
+                raise
+
+            self._remove_useless_axes()
+
+            self._database['points'].set(analyzed=Boolean(True)).where(
+                analyzed=Boolean(False)
+            ).execute()
+
+            self._database['order_rules'].set(analyzed=Boolean(True)).where(
+                analyzed=Boolean(False)
+            ).execute()
+
+            return conflicts
+
+    def checkpoint(self) -> int:
+        """
+        Saves the state cached from the database, to return to if changes are rolled back
+        :return: The checkpoint, see `rollback`
+        """
 
-        self._database['analysis'].set(value=UnsignedInt(new_value)).where(
-            id=UnsignedInt(largest['id'])
-        ).execute()
+        return self._orders_added
 
-        amount_of_rows_to_join = (
-            self._database['analysis']
-            .select('COUNT(*)')
-            .where(axis=axis.id)
-            .execute()[0]['COUNT(*)']
+    def find_conflict(self, large: Point, small: Point) -> list[int]:
+        """
+        Finds the chain of analyzed orders that contradicts an order
+        :param large: The larger point
+        :param small: The smaller point
+        :return: The contradicting points from small to large, each larger than the next,
+            or an empty list if the order is consistent
+        """
+
+        with self._database.route('primary'):
+            return self._known_orders().conflict(large.value, small.value)
+
+    def load_chains(self, orders: list[dict[str, Point]]) -> Chains:
+        """
+        Loads the axes affected by a list of orders and analyzes the orders in memory
+        :param orders: The orders to analyze, each in the form of {'large': point, 'small': point}
+        :return: The resulting chains
+        """
+
+        points = {point.value for order in orders for point in order.values()}
+
+        axis_ids = (
+            {
+                axis
+                for (axis,) in self._database['analysis']
+                .select('axis')
+                .where(
+                    point=tuple(Point(point) for point in points),
+                    value=(UnsignedInt(0), UnsignedInt(LARGEST_VALUE)),
+                )
+                .execute_tuples()
+            }
+            if points
+            else set()
         )
 
-        self._database['analysis'].select(
-            'point',
-            self.id.value,
-            f'{new_value} + {(LARGEST_VALUE - new_value) // amount_of_rows_to_join}'
-            f' * ROW_NUMBER() OVER (ORDER BY value)',
-        ).where(axis=axis.id, value=UnsignedInt(LARGEST_VALUE, negate=True)).into(
-            'analysis', ('point', 'axis', 'value')
-        ).execute()
+        axes: defaultdict[int, list[int]] = defaultdict(list)
 
-        self._database['analysis'].set(axis=self.id).where(
-            axis=axis.id, value=UnsignedInt(LARGEST_VALUE)
-        ).execute()
+        if axis_ids:
+            for axis, point in (
+                self._database['analysis']
+                .select('axis', 'point')
+                .where(axis=tuple(_Axis(axis) for axis in axis_ids))
+                .order_by('value')
+                .execute_tuples()
+            ):
+                axes[axis].append(point)
+
+        chains = Chains(axes)
+
+        for order in orders:
+            chains.add_order(order['large'].value, order['small'].value)
+
+        return chains
+
+    def rollback(self, checkpoint: int | None = None) -> None:
+        """
+        Returns to the state of a checkpoint after the changes since were rolled back.
+        The topology is only reloaded if orders were added to it since.
+        :param checkpoint: The checkpoint, see `checkpoint`, or None to forget the whole state
+        """
 
-        self._database['analysis'].delete().where(axis=axis.id).execute()
-        self._database['axes'].delete().where(id=axis.id).execute()
+        if checkpoint is None or self._orders_added != checkpoint:
+            self._topology = None
@@ -2,17 +2,102 @@
 
 from __future__ import annotations
 
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from collections import defaultdict
-from typing import Generic, TypeVar
-
-from .cells import Axis, Category as _Category
+from collections.abc import Generator, Iterable, Sequence
+from contextlib import AbstractContextManager
+from itertools import chain
+from json import dumps, loads
+from typing import Any, Generic, TypeVar
+
+from .analyzer import Engine
+from .backends import Backend
+from .cells import Axis
+from .cells import Category as _Category
 from .cells import Document as _Document
 from .cells import Element as _Element
 from .cells import KeyCell, LongText
 from .cells import Point as _Point
 from .cells import Property as _Property
 from .cells import ShortText
-from .database import Database
+from .database import INSERT_CHUNK, POOL_SIZE, Batch, Database, Route
+from .statements import STREAM_BATCH, Select
+
+# The amount of rows on a page of a listing, unless a page size is given
+PAGE_SIZE = 100
+
+
+class InvalidPage(ValueError):
+    """Raised when a page is requested with an invalid size or continuation token"""
+
+
+def _aggregate_descriptions(element: str) -> str:
+    """
+    Builds a column of the descriptions of an element, aggregated into a JSON array, so
+    listings fetch the descriptions along with the rest of their rows
+    :param element: The column of the element's ID
+    :return: The column, see `_load_descriptions`
+    """
+
+    return (
+        '(SELECT JSON_ARRAYAGG(descriptions.description) FROM descriptions'
+        f' WHERE descriptions.element = {element})'
+    )
+
+
+def _load_descriptions(descriptions: str | None) -> list[str | None]:
+    """
+    Loads the descriptions of an element from a column built by `_aggregate_descriptions`
+    :param descriptions: The column's value
+    :return: The descriptions, or [None] for an element without descriptions
+    """
+
+    return loads(descriptions or '[]') or [None]
+
+
+def _page(
+    select: Select, key: Sequence[str], size: int, token: str | None
+) -> tuple[list[tuple[Any, ...]], str | None]:
+    """
+    Fetches a page of rows in the order of a key, seeking past the previous page through the
+    key's index, so each page takes as long to fetch however far into the listing it is
+    :param select: The statement that selects the rows, with the key's columns first
+    :param key: The columns of the key, which is unique to each row
+    :param size: The largest amount of rows on the page
+    :param token: The continuation token of the previous page, or None for the first page
+    :return: The rows, and the continuation token of the next page, or None if there are no
+        more rows
+    :raise InvalidPage: If the size is not positive or the token was not made for the key
+    """
+
+    if size < 1:
+        raise InvalidPage(f'Page size must be positive, not {size}')
+
+    if token is not None:
+        try:
+            last = loads(urlsafe_b64decode(token.encode()))
+        except ValueError as error:
+            raise InvalidPage(f'Invalid continuation token {token!r}') from error
+
+        if (
+            not isinstance(last, list)
+            or len(last) != len(key)
+            or not all(isinstance(value, int | str) for value in last)
+        ):
+            raise InvalidPage(f'Invalid continuation token {token!r}')
+
+        select.after(key, last)
+
+    # An extra row tells whether there is a next page
+    rows = select.order_by(', '.join(key)).limit(size + 1).execute_tuples()
+
+    if len(rows) <= size:
+        return rows, None
+
+    return (
+        rows[:size],
+        urlsafe_b64encode(dumps(rows[size - 1][: len(key)]).encode()).decode(),
+    )
 
 
 class Archive:
@@ -20,10 +105,20 @@ class Archive:
 
     _database: Database
 
-    def __init__(self) -> None:
-        """Creates a Database object according to the optional config object"""
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        backend: Backend | None = None,
+        replica: Backend | None = None,
+    ) -> None:
+        """
+        Creates a Database object
+        :param pool_size: The amount of database connections to keep in the pool
+        :param backend: The backend that stores the archive, MariaDB by default
+        :param replica: An optional read replica of the backend to browse the archive on
+        """
 
-        self._database = Database()
+        self._database = Database(pool_size, backend, replica)
 
     def __repr__(self) -> str:
         return f'{type(self).__name__}()'
@@ -39,10 +134,24 @@ class Archive:
             assert large.parent == small.parent
         self._database['order_rules'].insert(large=large.id, small=small.id).execute()
 
-    def analyze_rules(self) -> None:
-        """Analyzes the archive"""
+    def analyze_rules(self, engine: Engine = 'sequential') -> list[list[int]]:
+        """
+        Analyzes the archive, skipping orders that contradict the known orders
+        :param engine: The analysis engine to use, see `Analyzer.analyze_rules`
+        :return: The point IDs of each contradicting chain, each larger than the next
+        """
 
-        self._database.analyzer.analyze_rules()
+        return self._database.analyzer.analyze_rules(engine)
+
+    def batch(self, size: int) -> AbstractContextManager[Batch]:
+        """
+        Groups operations into transactions of a fixed size, to commit many operations at once.
+        Each operation runs within `Batch.operation`, which rolls back a failed operation alone.
+        :param size: The amount of operations to commit at once
+        :return: A context manager providing the batch
+        """
+
+        return self._database.batch(size)
 
     def category(self, category_id: int) -> Category:
         """
@@ -53,6 +162,54 @@ class Archive:
 
         return Category(self._database, _Category(category_id))
 
+    def compare(self, first: Point, second: Point) -> dict[str, str | int | None]:
+        """
+        Compares two points according to the analysis
+        :param first: The first point
+        :param second: The second point
+        :return: The comparison, in the form of {
+            'order': 'before' if the first point is smaller, 'after' if it is larger, or 'unknown',
+            'axis': the ID of the axis both points are on, or None
+        }
+        """
+
+        return self.compare_many([(first, second)])[0]
+
+    def compare_many(
+        self, pairs: Iterable[tuple[Point, Point]]
+    ) -> list[dict[str, str | int | None]]:
+        """
+        Compares pairs of points according to the analysis, using a single query
+        :param pairs: The pairs of points to compare
+        :return: A list of comparisons in the same order as the pairs, see `compare`
+        """
+
+        ids = [(first.id.value, second.id.value) for first, second in pairs]
+        values: defaultdict[int, dict[int, int]] = defaultdict(dict)
+
+        if ids:
+            for row in (
+                self._database['analysis']
+                .select('point', 'axis', 'value')
+                .where(point=tuple(_Point(point) for point in {*chain(*ids)}))
+                .execute()
+            ):
+                values[row['point']][row['axis']] = row['value']
+
+        comparisons: list[dict[str, str | int | None]] = []
+
+        for first, second in ids:
+            axis = min(values[first].keys() & values[second].keys(), default=None)
+
+            if axis is None or first == second:
+                comparisons.append({'order': 'unknown', 'axis': None})
+            elif values[first][axis] < values[second][axis]:
+                comparisons.append({'order': 'before', 'axis': axis})
+            else:
+                comparisons.append({'order': 'after', 'axis': axis})
+
+        return comparisons
+
     def connect(self) -> None:
         """Connects to the database"""
 
@@ -84,7 +241,7 @@ class Archive:
         return Document(self._database, _Document(identifier))
 
     def drop(self) -> None:
-        """Deletes the database"""
+        """Deletes the database and closes the connection"""
 
         self._database.drop()
 
@@ -118,7 +275,11 @@ class Archive:
             self._database.table_references(
                 'analysis', 'points', 'categories', 'properties'
             )
-            .select('points.element', 'categories.name', 'properties.name')
+            .select(
+                'categories.name',
+                'properties.name',
+                _aggregate_descriptions('points.element'),
+            )
             .where(
                 **{
                     'analysis.axis': Axis(axis_id),
@@ -128,34 +289,16 @@ class Archive:
                 }
             )
             .order_by('analysis.value')
-            .execute()
+            .execute_tuples()
         )
 
-        descriptions: defaultdict[int, list[str]] = defaultdict(lambda: [])
-
-        for row in (
-            self._database['elements']
-            .left_join('descriptions', ('elements.id', 'descriptions.element'))
-            .select('elements.id', 'descriptions.description')
-            .where(
-                **{
-                    'elements.id': tuple(
-                        _Element(id)
-                        for id in set(point['points.element'] for point in points)
-                    )
-                }
-            )
-            .execute()
-        ):
-            descriptions[row['elements.id']].append(row['descriptions.description'])
-
         return [
             {
-                'category': point['categories.name'],
-                'property': point['properties.name'],
-                'descriptions': descriptions[point['points.element']],
+                'category': category,
+                'property': property_name,
+                'descriptions': _load_descriptions(descriptions),
             }
-            for point in points
+            for category, property_name, descriptions in points
         ]
 
     def get_categories(self) -> list[dict[str, str | int]]:
@@ -172,6 +315,37 @@ class Archive:
             .execute()
         ]
 
+    def get_categories_page(
+        self, size: int = PAGE_SIZE, token: str | None = None
+    ) -> tuple[list[dict[str, str | int]], str | None]:
+        """
+        Fetches a page of categories, see `get_categories`
+        :param size: The largest amount of categories on the page
+        :param token: The continuation token of the previous page, or None for the first page
+        :return: The categories, and the continuation token of the next page or None
+        :raise InvalidPage: If the size or the token is invalid
+        """
+
+        rows, next_token = _page(
+            self._database['categories'].select('name', 'id'),
+            ('name', 'id'),
+            size,
+            token,
+        )
+
+        return [{'id': id, 'name': name} for name, id in rows], next_token
+
+    def get_conflict(self, large: Point, small: Point) -> list[int]:
+        """
+        Finds the chain of analyzed orders that contradicts an order
+        :param large: The point that would be larger
+        :param small: The point that would be smaller
+        :return: The point IDs of the chain from small to large, each larger than the next,
+            or an empty list if the order is consistent
+        """
+
+        return self._database.analyzer.find_conflict(large.id, small.id)
+
     def get_documents(self) -> list[dict[str, str | int]]:
         """
         Fetches all documents
@@ -186,6 +360,26 @@ class Archive:
             .execute()
         ]
 
+    def get_documents_page(
+        self, size: int = PAGE_SIZE, token: str | None = None
+    ) -> tuple[list[dict[str, str | int]], str | None]:
+        """
+        Fetches a page of documents, see `get_documents`
+        :param size: The largest amount of documents on the page
+        :param token: The continuation token of the previous page, or None for the first page
+        :return: The documents, and the continuation token of the next page or None
+        :raise InvalidPage: If the size or the token is invalid
+        """
+
+        rows, next_token = _page(
+            self._database['documents'].select('name', 'id'),
+            ('name', 'id'),
+            size,
+            token,
+        )
+
+        return [{'id': id, 'name': name} for name, id in rows], next_token
+
     def get_elements(self) -> list[dict[str, int | str | list[str]]]:
         """
         Fetches all elements, in the form of [{
@@ -195,31 +389,38 @@ class Archive:
         }]
         """
 
-        elements = (
-            self._database.table_references('elements', 'categories')
-            .select('elements.id', 'categories.name')
-            .where(**{'elements.category': 'categories.id'})
-            .execute()
-        )
+        return list(self.iter_elements())
 
-        descriptions: defaultdict[int, list[str]] = defaultdict(lambda: [])
+    def get_elements_page(
+        self, size: int = PAGE_SIZE, token: str | None = None
+    ) -> tuple[list[dict[str, int | str | list[str]]], str | None]:
+        """
+        Fetches a page of elements by order, see `get_elements`
+        :param size: The largest amount of elements on the page
+        :param token: The continuation token of the previous page, or None for the first page
+        :return: The elements, and the continuation token of the next page or None
+        :raise InvalidPage: If the size or the token is invalid
+        """
 
-        for row in (
-            self._database['elements']
-            .left_join('descriptions', ('elements.id', 'descriptions.element'))
-            .select('elements.id', 'descriptions.description')
-            .execute()
-        ):
-            descriptions[row['elements.id']].append(row['descriptions.description'])
+        rows, next_token = _page(
+            self._database.table_references('elements', 'categories')
+            .select(
+                'elements.id', 'categories.name', _aggregate_descriptions('elements.id')
+            )
+            .where(**{'elements.category': 'categories.id'}),
+            ('elements.id',),
+            size,
+            token,
+        )
 
         return [
             {
-                'id': element['elements.id'],
-                'category': element['categories.name'],
-                'descriptions': descriptions[element['elements.id']],
+                'id': element,
+                'category': category,
+                'descriptions': _load_descriptions(descriptions),
             }
-            for element in elements
-        ]
+            for element, category, descriptions in rows
+        ], next_token
 
     def get_points(self) -> list[dict[str, int | str | list[str]]]:
         """
@@ -232,46 +433,114 @@ class Archive:
         :return: All points
         """
 
-        points = (
+        return list(self.iter_points())
+
+    def get_points_page(
+        self, size: int = PAGE_SIZE, token: str | None = None
+    ) -> tuple[list[dict[str, int | str | list[str]]], str | None]:
+        """
+        Fetches a page of points, ordered by their elements, see `get_points`
+        :param size: The largest amount of points on the page
+        :param token: The continuation token of the previous page, or None for the first page
+        :return: The points, and the continuation token of the next page or None
+        :raise InvalidPage: If the size or the token is invalid
+        """
+
+        rows, next_token = _page(
             self._database.table_references('points', 'categories', 'properties')
-            .select('points.id', 'points.element', 'categories.name', 'properties.name')
+            .select(
+                'points.element',
+                'points.id',
+                'categories.name',
+                'properties.name',
+                _aggregate_descriptions('points.element'),
+            )
             .where(
                 **{
                     'points.property': 'properties.id',
                     'properties.category': 'categories.id',
                 }
-            )
-            .order_by('points.element')
-            .execute()
+            ),
+            ('points.element', 'points.id'),
+            size,
+            token,
         )
 
-        elements: defaultdict[int, list[str]] = defaultdict(lambda: [])
+        return [
+            {
+                'id': point,
+                'category': category,
+                'property': property_name,
+                'descriptions': _load_descriptions(descriptions),
+            }
+            for _, point, category, property_name, descriptions in rows
+        ], next_token
+
+    def get_statement_statistics(self) -> dict[str, dict[str, float | int]]:
+        """
+        Fetches the measurements of the statements run since the archive was created, by
+        statement shape, see `Profiler.summary`
+        :return: The measurements, from the shape with the longest total duration
+        """
+
+        return self._database.profiler.summary()
 
-        for row in (
-            self._database['elements']
-            .left_join('descriptions', ('elements.id', 'descriptions.element'))
-            .select('elements.id', 'descriptions.description')
+    def iter_elements(
+        self, batch: int = STREAM_BATCH
+    ) -> Generator[dict[str, int | str | list[str]], None, None]:
+        """
+        Streams all elements by order, see `get_elements`
+        :param batch: The amount of rows to fetch from the database at once
+        :return: A generator of elements
+        """
+
+        for element, category, descriptions in (
+            self._database.table_references('elements', 'categories')
+            .select(
+                'elements.id', 'categories.name', _aggregate_descriptions('elements.id')
+            )
+            .where(**{'elements.category': 'categories.id'})
+            .order_by('elements.id')
+            .stream_tuples(batch)
+        ):
+            yield {
+                'id': element,
+                'category': category,
+                'descriptions': _load_descriptions(descriptions),
+            }
+
+    def iter_points(
+        self, batch: int = STREAM_BATCH
+    ) -> Generator[dict[str, int | str | list[str]], None, None]:
+        """
+        Streams all points, ordered by their elements, see `get_points`
+        :param batch: The amount of rows to fetch from the database at once
+        :return: A generator of points
+        """
+
+        for point, category, property_name, descriptions in (
+            self._database.table_references('points', 'categories', 'properties')
+            .select(
+                'points.id',
+                'categories.name',
+                'properties.name',
+                _aggregate_descriptions('points.element'),
+            )
             .where(
                 **{
-                    'elements.id': tuple(
-                        _Element(id)
-                        for id in set(point['points.element'] for point in points)
-                    )
+                    'points.property': 'properties.id',
+                    'properties.category': 'categories.id',
                 }
             )
-            .execute()
+            .order_by('points.element, points.id')
+            .stream_tuples(batch)
         ):
-            elements[row['elements.id']].append(row['descriptions.description'])
-
-        return [
-            {
-                'id': point['points.id'],
-                'category': point['categories.name'],
-                'property': point['properties.name'],
-                'descriptions': elements[point['points.element']],
+            yield {
+                'id': point,
+                'category': category,
+                'property': property_name,
+                'descriptions': _load_descriptions(descriptions),
             }
-            for point in points
-        ]
 
     def new_category(self, name: str) -> Category:
         """
@@ -290,24 +559,62 @@ class Archive:
         :return: A document object to access the newly created document
         """
 
-        self._database['documents'].insert(name=ShortText(name)).execute()
-        return self.document(self._database.last_row_id)
+        return self.new_documents([name])[0]
+
+    def new_documents(self, names: Iterable[str]) -> list[Document]:
+        """
+        Creates new documents in bulk
+        :param names: The names of the documents
+        :return: Document objects to access the newly created documents, in order
+        """
+
+        return [
+            self.document(identifier)
+            for identifier in self._database['documents'].insert_chunks(
+                ('name',), ((ShortText(name),) for name in names)
+            )
+        ]
 
     def new_element(self, category: Category) -> Element:
         """
-        Creates a new element
+        Creates a new element and analyzes its points according to the analyzed order rules
         :param category: The element's category
         :return: An element object to access the newly created element
         """
 
-        self._database['elements'].insert(category=category.id).execute()
-        element_id = self._database.last_row_id
+        return self.new_elements(category, 1)[0]
+
+    def new_elements(self, category: Category, amount: int) -> list[Element]:
+        """
+        Creates new elements in bulk and analyzes their points according to the analyzed
+        order rules
+        :param category: The elements' category
+        :param amount: The amount of elements to create
+        :return: Element objects to access the newly created elements, in order
+        """
+
+        with self._database.route('primary'):
+            identifiers = self._database['elements'].insert_chunks(
+                ('category',), ((category.id,) for _ in range(amount))
+            )
+
+            for start in range(0, len(identifiers), INSERT_CHUNK):
+                elements = tuple(
+                    _Element(identifier)
+                    for identifier in identifiers[start : start + INSERT_CHUNK]
+                )
+
+                self._database.table_references('elements', 'properties').select(
+                    'elements.id', 'properties.id'
+                ).where(
+                    **{'elements.id': elements, 'properties.category': category.id}
+                ).into(
+                    'points', ('element', 'property')
+                ).execute()
 
-        self._database['properties'].select(element_id, 'id').where(
-            category=category.id
-        ).into('points', ('element', 'property')).execute()
+                self._database.analyzer.analyze_elements(elements)
 
-        return self.element(element_id)
+        return [self.element(identifier) for identifier in identifiers]
 
     def point(self, identifier: int) -> Point:
         """
@@ -331,7 +638,26 @@ class Archive:
         """Completely resets the database"""
 
         self.drop()
-        self._database.init()
+        self.connect()
+
+    def route(self, target: Route | None) -> AbstractContextManager[None]:
+        """
+        Routes the reads within the context, see `Database.route`.
+        Without a replica, all reads run on the primary anyway.
+        :param target: Either 'primary', 'replica', or None to pick automatically
+        :return: A context manager for the routing
+        """
+
+        return self._database.route(target)
+
+    def transaction(self) -> AbstractContextManager[None]:
+        """
+        Runs operations within a transaction, which is committed at the end or rolled back
+        on an error. Nested transactions run within savepoints.
+        :return: A context manager for the transaction
+        """
+
+        return self._database.transaction()
 
 
 PrimaryKey = TypeVar('PrimaryKey', bound=KeyCell)
@@ -373,18 +699,39 @@ class Category(Row[_Category]):
         :return: A list of lists of descriptions
         """
 
-        elements: defaultdict[int, list[str]] = defaultdict(lambda: [])
+        return [
+            _load_descriptions(descriptions)
+            for (descriptions,) in self._database['elements']
+            .select(_aggregate_descriptions('elements.id'))
+            .where(**{'elements.category': self.id})
+            .order_by('elements.id')
+            .execute_tuples()
+        ]
 
-        for row in (
+    def get_elements_page(
+        self, size: int = PAGE_SIZE, token: str | None = None
+    ) -> tuple[list[list[str]], str | None]:
+        """
+        Fetches a page of the category's elements, see `get_elements`
+        :param size: The largest amount of elements on the page
+        :param token: The continuation token of the previous page, or None for the first page
+        :return: The elements' lists of descriptions, and the continuation token of the next
+            page or None
+        :raise InvalidPage: If the size or the token is invalid
+        """
+
+        rows, next_token = _page(
             self._database['elements']
-            .left_join('descriptions', ('elements.id', 'descriptions.element'))
-            .select('elements.id', 'descriptions.description')
-            .where(**{'elements.category': self.id})
-            .execute()
-        ):
-            elements[row['elements.id']].append(row['descriptions.description'])
+            .select('elements.id', _aggregate_descriptions('elements.id'))
+            .where(**{'elements.category': self.id}),
+            ('elements.id',),
+            size,
+            token,
+        )
 
-        return list(elements.values())
+        return [
+            _load_descriptions(descriptions) for _, descriptions in rows
+        ], next_token
 
     def get_name(self) -> str:
         """
@@ -455,7 +802,7 @@ class Category(Row[_Category]):
 
     def new_property(self, name: str) -> Property:
         """
-        Adds a property to the category
+        Adds a property to the category, with a point for each of the category's elements
         :param name: The property's name
         :return: A property object to access the newly created property
         """
@@ -463,8 +810,14 @@ class Category(Row[_Category]):
         self._database['properties'].insert(
             category=self.id, name=ShortText(name)
         ).execute()
+        property_id = self._database.last_row_id
+
+        # No analyzed order rule can refer to the new property yet
+        self._database['elements'].select('id', property_id, 'TRUE').where(
+            category=self.id
+        ).into('points', ('element', 'property', 'analyzed')).execute()
 
-        return self.property(self._database.last_row_id)
+        return self.property(property_id)
 
     def property(self, identifier: int) -> Property:
         """
@@ -486,18 +839,35 @@ class Document(Row[_Document]):
             document=self.id, element=element.id, description=LongText(description)
         ).execute()
 
+    def declare_descriptions(self, descriptions: Iterable[tuple[Element, str]]) -> None:
+        """
+        Adds declarations of descriptions of elements to the document in bulk
+        :param descriptions: The descriptions, each in the form of (element, description)
+        """
+
+        self._database['descriptions'].insert_chunks(
+            ('document', 'element', 'description'),
+            (
+                (self.id, element.id, LongText(description))
+                for element, description in descriptions
+            ),
+        )
+
     def declare_order(self, large: Point, small: Point) -> None:
         """
         Declares an order of two properties of elements
         :param large: The property that must be larger, in the form of (element, property)
         :param small: The property that must be smaller, in the form of (element, property)
+        :raise OrderConflict: If the order contradicts the analyzed orders
         """
 
-        self._database['orders'].insert(
-            document=self.id, large=large.id, small=small.id
-        ).execute()
+        # Inserted first, so a duplicate fails before it changes the known orders
+        with self._database.savepoint():
+            self._database['orders'].insert(
+                document=self.id, large=large.id, small=small.id
+            ).execute()
 
-        self._database.analyzer.analyze_order(large.id, small.id)
+            self._database.analyzer.analyze_order(large.id, small.id)
 
     def get_name(self) -> str:
         """:return: The document's name"""
@@ -533,8 +903,8 @@ class Document(Row[_Document]):
                 'categories AS small_cats',
             )
             .select(
-                'large.element',
-                'small.element',
+                _aggregate_descriptions('large.element'),
+                _aggregate_descriptions('small.element'),
                 'large_props.name',
                 'small_props.name',
                 'large_cats.name',
@@ -551,45 +921,31 @@ class Document(Row[_Document]):
                     'small_props.category': 'small_cats.id',
                 }
             )
-            .execute()
+            .execute_tuples()
         )
 
-        if orders:
-            descriptions: defaultdict[int, list[str]] = defaultdict(lambda: [])
-
-            for row in (
-                self._database['elements']
-                .left_join('descriptions', ('elements.id', 'descriptions.element'))
-                .select('elements.id', 'descriptions.description')
-                .where(
-                    **{
-                        'elements.id': tuple(
-                            _Element(element)
-                            for element in set(order['large.element'] for order in orders)
-                            | set(order['small.element'] for order in orders)
-                        )
-                    }
-                )
-                .execute()
-            ):
-                descriptions[row['elements.id']].append(row['descriptions.description'])
-
-            return [
-                {
-                    'large': {
-                        'category': order['large_cats.name'],
-                        'property': order['large_props.name'],
-                        'descriptions': descriptions[order['large.element']],
-                    },
-                    'small': {
-                        'category': order['small_cats.name'],
-                        'property': order['small_props.name'],
-                        'descriptions': descriptions[order['small.element']],
-                    },
-                }
-                for order in orders
-            ]
-        return []
+        return [
+            {
+                'large': {
+                    'category': large_category,
+                    'property': large_property,
+                    'descriptions': _load_descriptions(large),
+                },
+                'small': {
+                    'category': small_category,
+                    'property': small_property,
+                    'descriptions': _load_descriptions(small),
+                },
+            }
+            for (
+                large,
+                small,
+                large_property,
+                small_property,
+                large_category,
+                small_category,
+            ) in orders
+        ]
 
 
 class Element(Row[_Element]):
@@ -0,0 +1,318 @@
+"""Access to the points of single axes"""
+
+from __future__ import annotations
+
+from collections.abc import Generator
+from typing import TYPE_CHECKING, Literal
+
+from .cells import Analysis
+from .cells import Axis as _Axis
+from .cells import Point, UnsignedInt
+
+if TYPE_CHECKING:
+    from .database import Database
+
+LARGEST_VALUE = 2**32 - 1
+
+# A window of 2**level values overflows above (2 / DENSITY_BASE)**level points, which
+# amortizes relabeling to O(log n) points per insertion for any base between 1 and 2
+DENSITY_BASE = 1.2
+
+
+def window(value: int, level: int) -> range:
+    """
+    Returns the aligned window of 2**level values that contains a value
+    :param value: The value the window must contain
+    :param level: The window's level
+    :return: The window's range of values
+    """
+
+    start = value >> level << level
+    return range(start, min(start + 2**level, LARGEST_VALUE + 1))
+
+
+def relabel(
+    values: list[int], values_window: range, lower: int, upper: int, amount: int
+) -> tuple[dict[int, int], int, int]:
+    """
+    Spreads the values within a window evenly, leaving room for new values after a value.
+    The smallest and largest values of an axis are never moved.
+    :param values: The ascending values within the window, without 0 and the largest value
+    :param values_window: The window to spread the values in
+    :param lower: The value to leave room after
+    :param upper: The value following the lower value in the axis
+    :param amount: The amount of new values to leave room for
+    :return: A tuple containing the new values in the form of {old: new},
+        and the new lower and upper values
+    """
+
+    start = values_window.start - 1 if values_window.start else 0
+    end = min(values_window.stop, LARGEST_VALUE)
+
+    before = [value for value in values if value <= lower]
+    after = [value for value in values if value > lower]
+
+    total = len(before) + amount + len(after)
+    slots = [
+        start + (end - start) * (index + 1) // (total + 1) for index in range(total)
+    ]
+
+    new_values = dict(zip(before, slots)) | dict(
+        zip(after, slots[len(before) + amount :])
+    )
+
+    return (
+        new_values,
+        new_values.get(lower, lower),
+        new_values.get(upper, upper),
+    )
+
+
+class Axis:
+    """Allows access to an axis"""
+
+    _database: Database
+    id: _Axis
+
+    def __init__(self, database: Database, identifier: int) -> None:
+        self._database = database
+        self.id = _Axis(identifier)
+
+    def _add_point(self, point: Point, value: int) -> None:
+        """
+        Adds a new point to the axis
+        :param point: The point to add
+        :param value: The point's value within the axis
+        """
+
+        self._database['analysis'].insert(
+            point=point, axis=self.id, value=UnsignedInt(value)
+        ).execute()
+
+    def _get_points_by_size(
+        self, size: Literal['largest', 'smallest'], amount: int
+    ) -> Generator[dict[str, int], None, None]:
+        """
+        Fetches either the largest or smallest points in the axis
+        :param size: Whether should fetch the largest or smallest points
+        :param amount: The amount of points to fetch
+        :return: A list of points, each in the form of {'id': id, 'value': value}
+        """
+
+        return (
+            {'id': point['id'], 'value': point['value']}
+            for point in self._database['analysis']
+            .select('id', 'value')
+            .where(axis=self.id)
+            .order_by(
+                'value',
+                descending=(size == 'largest'),
+            )
+            .limit(amount)
+            .execute()
+        )
+
+    def _make_room(self, lower: int, upper: int, amount: int) -> tuple[int, int]:
+        """
+        Makes sure new points can be added between two adjacent values of the axis by
+        relabeling the smallest window around them that is sparse enough
+        :param lower: The value to add the points after
+        :param upper: The value following the lower value
+        :param amount: The amount of points to make room for
+        :return: The new lower and upper values, at least amount + 1 apart
+        """
+
+        if upper - lower > amount:
+            return lower, upper
+
+        levels = range(1, LARGEST_VALUE.bit_length() + 1)
+        counted = range(lower, lower)
+        count = 0
+
+        # Each window contains the previous one, so only the part around it is counted
+        for level in levels:
+            values_window = window(lower, level)
+
+            for rest in (
+                range(values_window.start, counted.start),
+                range(counted.stop, values_window.stop),
+            ):
+                if rest:
+                    count += (
+                        self._database['analysis']
+                        .select('COUNT(*)')
+                        .where(axis=self.id, value=rest)
+                        .execute_tuples()[0][0]
+                    )
+
+            counted = values_window
+
+            if (
+                count + amount <= (2 / DENSITY_BASE) ** level
+                and count + amount + 1 < len(values_window)
+                or level == levels[-1]
+            ):
+                break
+
+        rows = {
+            row['value']: row
+            for row in self._database['analysis']
+            .select('id', 'point', 'value')
+            .where(axis=self.id, value=values_window)
+            .execute()
+            if row['value'] not in (0, LARGEST_VALUE)
+        }
+
+        new_values, lower, upper = relabel(
+            sorted(rows), values_window, lower, upper, amount
+        )
+
+        moved = [
+            rows[old] | {'value': new} for old, new in new_values.items() if old != new
+        ]
+
+        # Rewriting the moved rows avoids clashing with UNIQUE(axis, value) midway
+        if moved:
+            self._database['analysis'].delete().where(
+                id=tuple(Analysis(row['id']) for row in moved)
+            ).execute()
+            self._database['analysis'].insert_many(
+                ('id', 'point', 'axis', 'value'),
+                *(
+                    (
+                        Analysis(row['id']),
+                        Point(row['point']),
+                        self.id,
+                        UnsignedInt(row['value']),
+                    )
+                    for row in moved
+                ),
+            ).execute()
+
+        return lower, upper
+
+    def add_after(self, point: Point) -> None:
+        """
+        Adds a point after the last point in the axis
+        :param point: The point to add
+        """
+
+        largest, second_largest = self._get_points_by_size('largest', 2)
+
+        lower, upper = self._make_room(second_largest['value'], LARGEST_VALUE, 1)
+
+        self._database['analysis'].set(value=UnsignedInt((lower + upper) // 2)).where(
+            id=UnsignedInt(largest['id'])
+        ).execute()
+
+        self._add_point(point, LARGEST_VALUE)
+
+    def add_before(self, point: Point) -> None:
+        """
+        Adds a point before the first point in the axis
+        :param point: The point to add
+        """
+
+        smallest, second_smallest = self._get_points_by_size('smallest', 2)
+
+        lower, upper = self._make_room(0, second_smallest['value'], 1)
+
+        self._database['analysis'].set(value=UnsignedInt((lower + upper) // 2)).where(
+            id=UnsignedInt(smallest['id'])
+        ).execute()
+
+        self._add_point(point, 0)
+
+    def append(self, axis: Axis, amount: int) -> None:
+        """
+        Moves the points of another axis after the points of this axis
+        :param axis: The axis to append to this axis
+        :param amount: The amount of points in the other axis
+        """
+
+        largest, second_largest = self._get_points_by_size('largest', 2)
+
+        lower, upper = self._make_room(second_largest['value'], LARGEST_VALUE, amount)
+        step = (upper - lower) // (amount + 1)
+
+        self._database['analysis'].set(value=UnsignedInt(lower + step)).where(
+            id=UnsignedInt(largest['id'])
+        ).execute()
+
+        self._database['analysis'].select(
+            'point',
+            self.id.value,
+            f'{lower + step} + {step} * ROW_NUMBER() OVER (ORDER BY value)',
+        ).where(axis=axis.id, value=UnsignedInt(LARGEST_VALUE, negate=True)).into(
+            'analysis', ('point', 'axis', 'value')
+        ).execute()
+
+        self._database['analysis'].set(axis=self.id).where(
+            axis=axis.id, value=UnsignedInt(LARGEST_VALUE)
+        ).execute()
+
+        self._database['analysis'].delete().where(axis=axis.id).execute()
+        self._database['axes'].delete().where(id=axis.id).execute()
+
+    def join(self, axis: Axis) -> Axis:
+        """
+        Combines this axis with another axis by moving the smaller axis into the larger one
+        :param axis: The axis to append to this axis
+        :return: The remaining axis
+        """
+
+        # Counts both axes up to a doubling limit, reading about as many rows as the smaller
+        limit = 64
+
+        while True:
+            self._database.statement(
+                'SELECT (SELECT COUNT(*) FROM ('
+                'SELECT id FROM analysis WHERE axis = ? LIMIT ?) AS own_points), '
+                '(SELECT COUNT(*) FROM ('
+                'SELECT id FROM analysis WHERE axis = ? LIMIT ?) AS other_points)',
+                (self.id.value, limit, axis.id.value, limit),
+            ).execute()
+            (own, other), *_ = self._database.fetch()
+
+            if min(own, other) < limit:
+                break
+
+            limit *= 2
+
+        if other <= own:
+            self.append(axis, other)
+            return self
+
+        axis.prepend(self, own)
+        return axis
+
+    def prepend(self, axis: Axis, amount: int) -> None:
+        """
+        Moves the points of another axis before the points of this axis
+        :param axis: The axis to prepend to this axis
+        :param amount: The amount of points in the other axis
+        """
+
+        smallest, second_smallest = self._get_points_by_size('smallest', 2)
+
+        lower, upper = self._make_room(0, second_smallest['value'], amount)
+        step = (upper - lower) // (amount + 1)
+
+        self._database['analysis'].select(
+            'point',
+            self.id.value,
+            f'{lower} + {step} * ROW_NUMBER() OVER (ORDER BY value)',
+        ).where(axis=axis.id, value=UnsignedInt(0, negate=True)).into(
+            'analysis', ('point', 'axis', 'value')
+        ).execute()
+
+        self._database['analysis'].set(value=UnsignedInt(lower + amount * step)).where(
+            id=UnsignedInt(smallest['id'])
+        ).execute()
+
+        self._database['analysis'].set(axis=self.id).where(
+            axis=axis.id, value=UnsignedInt(0)
+        ).execute()
+
+        self._database['analysis'].delete().where(axis=axis.id).execute()
+        self._database['axes'].delete().where(id=axis.id).execute()
@@ -2,13 +2,23 @@
 
 from __future__ import annotations
 
-from collections.abc import Collection, Iterable, Sequence
-from typing import Any, Self
-
-from mariadb import Cursor, ProgrammingError, connect
-from mariadb.connections import Connection
+from collections import OrderedDict
+from collections.abc import Collection, Generator, Iterable, Sequence
+from contextlib import contextmanager
+from threading import local
+from time import monotonic, perf_counter
+from typing import Any, Literal, Self
 
 from .analyzer import Analyzer
+from .backends import (
+    Backend,
+    Connection,
+    Cursor,
+    DatabaseError,
+    MariaDB,
+    MissingDatabase,
+    Pool,
+)
 from .cells import (
     Analysis,
     Axis,
@@ -26,8 +36,51 @@ from .cells import (
     ShortText,
     UnsignedInt,
 )
-from .registry import get_connection, get_database
-from .statements import DataStatement, Select, Statement
+from .migrations import MIGRATIONS, migrate
+from .profiling import Profiler
+from .statements import DataStatement, Insert, Select, Statement
+
+POOL_SIZE = 5
+
+# Reads stay on the primary for this many seconds after a commit, while replicas catch up
+REPLICA_LAG = 1.0
+
+Route = Literal['primary', 'replica']
+
+# The amount of prepared statements each session keeps on the server
+PREPARED_STATEMENTS = 64
+
+# Bulk inserts are split to stay well under the server's max_allowed_packet
+INSERT_CHUNK = 1000
+INSERT_CHUNK_BYTES = 2**20
+
+
+def chunk_rows(
+    rows: Iterable[Collection[Cell[Any]]],
+) -> Generator[list[Collection[Cell[Any]]], None, None]:
+    """
+    Splits rows into chunks that each fit in a single INSERT statement
+    :param rows: The rows to split, each as a sequence of values
+    :return: A generator of chunks of rows
+    """
+
+    chunk: list[Collection[Cell[Any]]] = []
+    size = 0
+
+    for row in rows:
+        row_size = sum(len(str(value).encode()) for value in row)
+
+        if chunk and (
+            len(chunk) == INSERT_CHUNK or size + row_size > INSERT_CHUNK_BYTES
+        ):
+            yield chunk
+            chunk, size = [], 0
+
+        chunk.append(row)
+        size += row_size
+
+    if chunk:
+        yield chunk
 
 
 class Column:
@@ -72,9 +125,14 @@ class TableReferences:
         :return: A joined table references object
         """
 
+        # Joins bind tighter than commas, so several references are joined as a group
+        references = (
+            f'({self._references})' if ', ' in self._references else self._references
+        )
+
         return TableReferences(
             self._database,
-            [f'{self._references} LEFT JOIN {table} ON {" = ".join(columns)}'],
+            [f'{references} LEFT JOIN {table} ON {" = ".join(columns)}'],
         )
 
     def select(self, *columns: str | int) -> Select:
@@ -108,6 +166,7 @@ class TableReferences:
 class Table(TableReferences, dict[str, Column]):
     """Represents an SQL table"""
 
+    _indexes: list[tuple[str, ...]]
     _uniques: list[tuple[str, ...]]
     name: str
 
@@ -123,13 +182,24 @@ class Table(TableReferences, dict[str, Column]):
         super().__init__(database, [table_name])
 
         self.name = table_name
+        self._indexes = []
         self._uniques = []
         self.update(
             {name: Column(name, column_type) for name, column_type in columns.items()}
         )
 
+    def _index_name(self, columns: tuple[str, ...]) -> str:
+        """
+        :param columns: The columns of an index
+        :return: The index's name
+        """
+
+        return '_'.join((self.name, *(column.split('(')[0] for column in columns)))
+
     def create(self) -> Statement:
-        """Returns a CREATE TABLE statement"""
+        """
+        Returns a CREATE TABLE statement, without the indexes added by `create_indexes`
+        """
 
         return self._database.statement(
             f'CREATE TABLE {self.name} ({", ".join(map(str, self.values()))}'
@@ -137,7 +207,22 @@ class Table(TableReferences, dict[str, Column]):
             + ')'
         )
 
-    def insert(self, **values: Cell[Any]) -> Statement:
+    def create_indexes(self) -> list[Statement]:
+        """
+        Returns CREATE INDEX statements that add the table's missing indexes, without
+        locking the table against writes
+        :return: A list of CREATE INDEX statements
+        """
+
+        return [
+            self._database.statement(
+                f'CREATE INDEX IF NOT EXISTS {self._index_name(columns)}'
+                f' ON {self.name} ({", ".join(columns)}) LOCK=NONE'
+            )
+            for columns in self._indexes
+        ]
+
+    def insert(self, **values: Cell[Any]) -> Insert:
         """
         Creates an INSERT statement that inserts values into the table (insecure)
         :param values: The values to insert in the form of column=value
@@ -146,9 +231,35 @@ class Table(TableReferences, dict[str, Column]):
 
         return self.insert_many(values.keys(), values.values())
 
+    def insert_chunks(
+        self, columns: Collection[str], rows: Iterable[Collection[Cell[Any]]]
+    ) -> list[int]:
+        """
+        Inserts rows using as few INSERT statements as fit in the server's packet size
+        :param columns: The columns to insert into
+        :param rows: The rows to insert, each as a sequence of values
+        :return: The IDs of the inserted rows, in order
+        """
+
+        ids: list[int] = []
+
+        # RETURNING lists the rows in no promised order, but the IDs a single statement
+        # generates ascend in the order of its rows
+        for chunk in chunk_rows(rows):
+            ids.extend(
+                sorted(
+                    row_id
+                    for (row_id,) in self.insert_many(columns, *chunk)
+                    .returning('id')
+                    .execute()
+                )
+            )
+
+        return ids
+
     def insert_many(
         self, columns: Collection[str], *rows: Collection[Cell[Any]]
-    ) -> Statement:
+    ) -> Insert:
         """
         Creates an INSERT statement to insert multiple rows into the table
         :param columns: The columns to insert into
@@ -156,7 +267,8 @@ class Table(TableReferences, dict[str, Column]):
         :return: An INSERT statement
         """
 
-        return self._database.statement(
+        return Insert(
+            self._database,
             f'INSERT INTO {self.name} ({", ".join(columns)}) VALUES'
             f' ({"), (".join(", ".join("?" * len(values)) for values in rows)})',
             tuple(value.value for row in rows for value in row),
@@ -170,6 +282,19 @@ class Table(TableReferences, dict[str, Column]):
 
         return DataStatement(self._database, f'DELETE FROM {self.name}')
 
+    def index(self, *columns: str) -> Self:
+        """
+        Adds an index to the table and returns it.
+        Queries that only use the index's columns are answered from the index alone, so
+        selected columns can follow the looked up columns to make a covering index.
+        A column can be given as 'column(length)' to only index its first characters.
+        :param columns: A list of columns for the index
+        :return: This table
+        """
+
+        self._indexes.append(columns)
+        return self
+
     def unique(self, *columns: str) -> Self:
         """
         Adds a unique index to the table and returns it
@@ -181,19 +306,145 @@ class Table(TableReferences, dict[str, Column]):
         return self
 
 
-class Database(dict[str, Table]):
-    """Represents an SQL database"""
+class Session:
+    """
+    A connection checked out of a pool and its cursors, used by one thread at a time.
+    Statements with parameters run on prepared cursors, one per statement, so the server
+    parses each statement once. The least recently used prepared cursors are closed.
+    """
+
+    _text_cursor: Cursor
+    backend: Backend
+    committed: float
+    connection: Connection
+    cursor: Cursor
+    prepared: OrderedDict[str, Cursor]
+    uncommitted: bool
 
-    _connection: Connection
-    _cursor: Cursor
+    def __init__(self, backend: Backend, connection: Connection) -> None:
+        """
+        :param backend: The backend the connection belongs to
+        :param connection: The pooled connection
+        """
+
+        self.backend = backend
+        self.committed = float('-inf')
+        self.connection = connection
+        self.prepared = OrderedDict()
+        self.uncommitted = False
+        self._text_cursor = self.cursor = backend.cursor(connection, False)
+
+    def close(self) -> None:
+        """Closes the cursors and returns the connection to its pool"""
+
+        for cursor in self.prepared.values():
+            cursor.close()
+        self._text_cursor.close()
+        self.connection.close()
+
+    def use_cursor(self, statement: str, prepared: bool) -> Cursor:
+        """
+        Picks the cursor to execute a statement on, and makes it the current cursor
+        :param statement: The statement to execute
+        :param prepared: Whether to use the statement's prepared cursor
+        :return: The cursor
+        """
+
+        if not prepared:
+            self.cursor = self._text_cursor
+        elif statement in self.prepared:
+            self.prepared.move_to_end(statement)
+            self.cursor = self.prepared[statement]
+        else:
+            if len(self.prepared) >= PREPARED_STATEMENTS:
+                self.prepared.popitem(last=False)[1].close()
+            self.cursor = self.prepared[statement] = self.backend.cursor(
+                self.connection, True
+            )
+
+        return self.cursor
+
+
+class Batch:
+    """Groups operations into transactions, committing once per amount of operations"""
+
+    _database: Database
+    _pending: int
+    size: int
+
+    def __init__(self, database: Database, size: int) -> None:
+        """
+        :param database: The database to run the operations on
+        :param size: The amount of operations to commit at once
+        """
+
+        self._database = database
+        self._pending = 0
+        self.size = size
+
+    def commit(self) -> None:
+        """Commits the pending operations"""
+
+        self._database.commit()
+        self._pending = 0
+
+    @contextmanager
+    def operation(self) -> Generator[None, None, None]:
+        """
+        Runs an operation within a savepoint, so a failed operation is rolled back alone,
+        and commits once enough operations succeeded
+        :return: A context manager for the operation
+        """
+
+        with self._database.savepoint():
+            yield
+
+        self._pending += 1
+        if self._pending >= self.size:
+            self.commit()
+
+
+class Database(dict[str, Table]):
+    """
+    Represents an SQL database.
+    Each thread runs its statements on its own session, checked out of a connection pool on
+    first use, so concurrent threads never share a connection or a cursor.
+    Statements are written for MariaDB, and translated by the backend that stores the data.
+    Errors of the backend are raised as `DatabaseError`.
+    Pure reads can run on a read replica, see `route`.
+    """
+
+    _backends: dict[Route, Backend]
+    _local: local
+    _pools: dict[Route, Pool]
     analyzer: Analyzer
     connected: bool
+    pool_size: int
+    profiler: Profiler
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        backend: Backend | None = None,
+        replica: Backend | None = None,
+    ) -> None:
+        """
+        :param pool_size: The amount of connections to keep in the pool
+        :param backend: The backend that stores the data, MariaDB by default
+        :param replica: An optional read replica of the backend to run pure reads on
+        """
 
-    def __init__(self) -> None:
         super().__init__()
 
+        self._backends = {'primary': backend or MariaDB()}
+        if replica is not None:
+            self._backends['replica'] = replica
+        self._local = local()
+        self._pools = {}
         self.analyzer = Analyzer(self)
         self.connected = False
+        self.pool_size = pool_size
+        self.profiler = Profiler()
 
         self.update(
             {
@@ -207,37 +458,39 @@ class Database(dict[str, Table]):
                         'categories',
                         id=Category.primary_key(),
                         name=ShortText,
-                    ),
+                    ).index('name'),
                     self.table(
                         'documents',
                         id=Document.primary_key(),
                         name=ShortText,
-                    ),
+                    ).index('name'),
                     self.table(
                         'elements',
                         id=Element.primary_key(),
                         category=Category,
-                    ),
+                    ).index('category'),
                     self.table(
                         'descriptions',
                         id=Description.primary_key(),
                         document=Document,
                         element=Element,
                         description=LongText,
-                    ),
+                    ).index('element'),
                     self.table(
                         'properties',
                         id=Property.primary_key(),
                         category=Category,
                         name=ShortText,
-                    ),
+                    ).index('category', 'name'),
                     self.table(
                         'points',
                         id=Point.primary_key(),
                         element=Element,
                         property=Property,
                         analyzed=Boolean,
-                    ).unique('element', 'property'),
+                    )
+                    .unique('element', 'property')
+                    .index('property', 'element'),
                     self.table(
                         'analysis',
                         id=Analysis.primary_key(),
@@ -246,7 +499,8 @@ class Database(dict[str, Table]):
                         value=UnsignedInt,
                     )
                     .unique('axis', 'value')
-                    .unique('point', 'axis'),
+                    .unique('point', 'axis')
+                    .index('point', 'value', 'axis'),
                     self.table(
                         'order_rules',
                         id=OrderRule.primary_key(),
@@ -261,64 +515,289 @@ class Database(dict[str, Table]):
                         large=Point,
                         small=Point,
                     ).unique('document', 'large', 'small'),
+                    self.table(
+                        'schema_version',
+                        version=UnsignedInt,
+                    ),
+                    # Not a reference to axes, since removed axes may still be listed
+                    self.table(
+                        'touched_axes',
+                        axis=UnsignedInt,
+                    ),
                 )
             }
         )
 
+    @property
+    def _session(self) -> Session:
+        """The current thread's session, checked out on first use"""
+
+        if getattr(self._local, 'session', None) is None:
+            self._local.session = Session(
+                self.backend, self._pools['primary'].get_connection()
+            )
+            self.backend.use(self._local.session.connection)
+
+        return self._local.session
+
+    @property
+    def _reading_session(self) -> Session:
+        """
+        The session to run a pure read on: the replica's, unless the read is routed to the
+        primary, or runs within a transaction, or could miss changes the current thread
+        has not committed or has only committed within `REPLICA_LAG` seconds
+        """
+
+        route = getattr(self._local, 'route', None)
+        session = getattr(self._local, 'session', None)
+
+        if 'replica' not in self._pools or route == 'primary':
+            return self._session
+
+        if route != 'replica' and (
+            getattr(self._local, 'depth', 0)
+            or session is not None
+            and (session.uncommitted or monotonic() - session.committed < REPLICA_LAG)
+        ):
+            return self._session
+
+        if getattr(self._local, 'replica_session', None) is None:
+            replica = self._backends['replica']
+            self._local.replica_session = Session(
+                replica, self._pools['replica'].get_connection()
+            )
+            replica.use(self._local.replica_session.connection)
+            replica.read_only(self._local.replica_session.connection)
+
+        return self._local.replica_session
+
+    @contextmanager
+    def batch(self, size: int) -> Generator[Batch, None, None]:
+        """
+        Groups the operations run through the batch into transactions of a fixed size.
+        The remaining operations are committed at the end, or rolled back on an error.
+        :param size: The amount of operations to commit at once
+        :return: A context manager providing the batch
+        """
+
+        batch = Batch(self, size)
+
+        with self.transaction():
+            yield batch
+
+    @contextmanager
+    def checkout(self) -> Generator[Session, None, None]:
+        """
+        Runs the current thread's statements on a separate session within a transaction,
+        which is committed at the end or rolled back on an error. Checkouts can be nested.
+        :return: A context manager providing the session
+        """
+
+        previous = getattr(self._local, 'session', None)
+        self._local.session = None
+        session = self._session
+        checkpoint = self.analyzer.checkpoint()
+
+        try:
+            yield session
+            session.connection.commit()
+        except BaseException:
+            session.connection.rollback()
+            self.analyzer.rollback(checkpoint)
+            raise
+        finally:
+            session.close()
+            self._local.session = previous
+
     def close(self) -> None:
-        """Closes the connection"""
+        """Closes the current thread's sessions and the pools' connections"""
 
-        self._cursor.close()
-        self._connection.close()
+        for name in ('session', 'replica_session'):
+            if getattr(self._local, name, None) is not None:
+                getattr(self._local, name).close()
+                setattr(self._local, name, None)
+
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = {}
         self.connected = False
 
     def commit(self) -> None:
-        """Commits the changes to the database"""
+        """Commits the changes of the current thread's session to the database"""
+
+        session = self._session
 
-        self._connection.commit()
+        try:
+            session.connection.commit()
+        except self.backend.errors as error:
+            raise DatabaseError(str(error)) from error
+
+        if session.uncommitted:
+            session.committed = monotonic()
+            session.uncommitted = False
 
     def connect(self) -> None:
-        """Connects to the database, creates a cursor, and saves the connection and the cursor"""
+        """
+        Creates the connection pools, and creates the database if it does not exist or
+        migrates it to the current schema if it does
+        """
+
+        # The connector rejects a pool named like one that is still open
+        if self.connected:
+            self.close()
+
+        self._local = local()
 
-        self._connection = connect(**get_connection())
-        self._cursor = self._connection.cursor()
         try:
-            self.use().execute()
-        except ProgrammingError:
-            self.init()
+            self._pools = {
+                'primary': self.backend.pool(f'archivist-{id(self)}', self.pool_size)
+            }
+
+            try:
+                self._session
+            except MissingDatabase:
+                self.init()
+                self.commit()
+            else:
+                migrate(self)
+
+            # Created last, so the migrations read from the primary
+            if self.replica is not None:
+                self._pools['replica'] = self.replica.pool(
+                    f'archivist-{id(self)}-replica', self.pool_size
+                )
+        except self.backend.errors as error:
+            raise DatabaseError(str(error)) from error
         self.connected = True
 
+    def create_indexes(self) -> None:
+        """Adds the declared indexes that are missing from the database"""
+
+        for table in self.values():
+            for statement in table.create_indexes():
+                statement.execute()
+
     def drop(self) -> None:
-        """Drops the database"""
+        """Drops the database and closes the connection pools"""
 
-        self.execute(f'DROP DATABASE {self._connection.database}')
-        self.connected = False
+        try:
+            self.backend.drop(self._session.connection)
+        except self.backend.errors as error:
+            raise DatabaseError(str(error)) from error
+        self.close()
 
-    def execute(self, statement: str, params: Sequence[Any] = ()) -> None:
+    def execute(
+        self, statement: str, params: Sequence[Any] = (), read_only: bool = False
+    ) -> None:
         """
-        Executes an SQL statement
+        Executes an SQL statement on the current thread's session, and records it in
+        `profiler`.
+        Statements with parameters are prepared once per session, counting the reuses of
+        prepared statements as hits in `Profiler.statement_cache`.
         :param statement: The statement to execute
         :param params: Params to pass to the database
+        :param read_only: Whether the statement only reads, so it can run on the replica
         """
 
-        self._cursor.execute(statement, params)
+        if read_only:
+            session = self._local.last = self._reading_session
+        else:
+            session = self._local.last = self._session
+            session.uncommitted = True
+
+        if params:
+            self.profiler.statement_cache[
+                'hits' if statement in session.prepared else 'misses'
+            ] += 1
+
+        start = perf_counter()
+        cursor = session.use_cursor(statement, bool(params))
+
+        try:
+            cursor.execute(session.backend.translate(statement), params)
+        except session.backend.errors as error:
+            raise DatabaseError(str(error)) from error
+
+        # The rows of queries are counted as they are fetched, since SQLite only reports
+        # how many rows a statement changed
+        returns_rows = cursor.description is not None
+        self.profiler.record(
+            statement,
+            params,
+            perf_counter() - start,
+            0 if returns_rows else cursor.rowcount,
+        )
+        self._local.fetching = statement if returns_rows else None
 
     def init(self) -> None:
         """Creates the database and initializes it"""
 
-        self.execute(f'CREATE DATABASE {get_database()}')
-        self.use().execute()
+        self.analyzer = Analyzer(self)
+
+        self.backend.create(self._session.connection)
 
         for table in self.values():
             table.create().execute()
+        self.create_indexes()
+
+        self['schema_version'].insert(version=UnsignedInt(len(MIGRATIONS))).execute()
 
     def fetch(self) -> list[tuple[Any, ...]]:
         """
-        Fetches all pending rows from the database
+        Fetches all pending rows of the last executed statement
         :return: A list of rows
         """
 
-        return self._cursor.fetchall()
+        rows = self._local.last.cursor.fetchall()
+
+        if getattr(self._local, 'fetching', None) is not None:
+            self.profiler.add_rows(self._local.fetching, len(rows))
+            self._local.fetching = None
+
+        return rows
+
+    @contextmanager
+    def route(self, target: Route | None) -> Generator[None, None, None]:
+        """
+        Routes the current thread's pure reads, for example for the length of a request
+        :param target: Either 'primary' to see the latest changes, 'replica' to accept
+            replication lag even after writes, or None to pick automatically
+        :return: A context manager for the routing
+        """
+
+        previous = getattr(self._local, 'route', None)
+        self._local.route = target
+
+        try:
+            yield
+        finally:
+            self._local.route = previous
+
+    @contextmanager
+    def savepoint(self) -> Generator[None, None, None]:
+        """
+        Runs the current thread's statements within a savepoint of the current transaction,
+        and rolls back to it on an error. Savepoints can be nested.
+        :return: A context manager for the savepoint
+        """
+
+        depth = getattr(self._local, 'depth', 0)
+        name = f'level_{depth}'
+
+        self.execute(f'SAVEPOINT {name}')
+        self._local.depth = depth + 1
+        checkpoint = self.analyzer.checkpoint()
+
+        try:
+            yield
+        except BaseException:
+            self.execute(f'ROLLBACK TO SAVEPOINT {name}')
+            self.analyzer.rollback(checkpoint)
+            raise
+        else:
+            self.execute(f'RELEASE SAVEPOINT {name}')
+        finally:
+            self._local.depth = depth
 
     def statement(self, statement: str, params: Iterable[Any] = ()) -> Statement:
         """
@@ -330,6 +809,42 @@ class Database(dict[str, Table]):
 
         return Statement(self, statement, params)
 
+    def stream(
+        self, statement: str, params: Sequence[Any], batch: int
+    ) -> Generator[tuple[Any, ...], None, None]:
+        """
+        Executes a query through a server-side cursor on the current thread's session and
+        yields its rows, fetching them in batches. The rows are kept on the server, so other
+        statements can run on the session between batches. The query runs on the replica
+        when the current thread's reads can, see `route`.
+        :param statement: The query to execute
+        :param params: Params to pass to the database
+        :param batch: The amount of rows to fetch at once
+        :return: A generator of rows
+        """
+
+        session = self._reading_session
+        cursor = session.backend.server_cursor(session.connection, batch)
+
+        # Only the time spent in the database counts, not the time between batches
+        start = perf_counter()
+        duration = 0.0
+        count = 0
+
+        try:
+            cursor.execute(session.backend.translate(statement), params)
+            while rows := cursor.fetchmany(batch):
+                duration += perf_counter() - start
+                count += len(rows)
+                yield from rows
+                start = perf_counter()
+            duration += perf_counter() - start
+        except session.backend.errors as error:
+            raise DatabaseError(str(error)) from error
+        finally:
+            cursor.close()
+            self.profiler.record(statement, params, duration, count)
+
     def table(
         self,
         table_name: str,
@@ -354,18 +869,59 @@ class Database(dict[str, Table]):
 
         return TableReferences(self, references)
 
-    def use(self) -> Statement:
+    @contextmanager
+    def transaction(self) -> Generator[None, None, None]:
         """
-        Creates a USE statement
-        :return: The use statement
+        Runs the current thread's statements within a transaction, which is committed at the
+        end or rolled back on an error. Nested transactions run within savepoints.
+        :return: A context manager for the transaction
         """
 
-        return self.statement(f'USE {get_database()}')
+        if getattr(self._local, 'depth', 0):
+            with self.savepoint():
+                yield
+            return
+
+        self._local.depth = 1
+        # Rolling back also discards the changes made before the transaction began
+        checkpoint = None if self.uncommitted else self.analyzer.checkpoint()
+
+        try:
+            yield
+        except BaseException:
+            self._session.connection.rollback()
+            self._session.uncommitted = False
+            self.analyzer.rollback(checkpoint)
+            raise
+        else:
+            self.commit()
+        finally:
+            self._local.depth = 0
+
+    @property
+    def backend(self) -> Backend:
+        """The backend that stores the data"""
+
+        return self._backends['primary']
 
     @property
     def last_row_id(self) -> int:
         """
-        The ID generated for AUTO_INCREMENT if the last query was INSERT or UPDATE, otherwise 0
+        The ID generated for AUTO_INCREMENT if the last query was INSERT or UPDATE, otherwise 0.
+        For a multiple-row INSERT, the ID of the first inserted row.
         """
 
-        return self._cursor.lastrowid
+        return self.backend.first_row_id(self._session.cursor)
+
+    @property
+    def replica(self) -> Backend | None:
+        """The read replica of the backend, if any"""
+
+        return self._backends.get('replica')
+
+    @property
+    def uncommitted(self) -> bool:
+        """Whether the current thread has written changes that are not committed yet"""
+
+        session = getattr(self._local, 'session', None)
+        return session is not None and session.uncommitted
@@ -0,0 +1,297 @@
+"""In-memory structures for analyzing the order of points"""
+
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from collections.abc import Hashable, Iterable, Iterator
+from typing import Generic, TypeVar
+
+Item = TypeVar('Item', bound=Hashable)
+
+
+class Chains:
+    """
+    A set of axes held in memory, each as a chain of points from smallest to largest.
+    Existing axes are keyed by their IDs, new axes by negative temporary keys.
+    """
+
+    _chains: dict[int, deque[int]]
+    _largest: defaultdict[int, set[int]]
+    _new_key: int
+    _smallest: defaultdict[int, set[int]]
+    changed: set[int]
+    removed: set[int]
+
+    def __init__(self, axes: dict[int, Iterable[int]]) -> None:
+        """
+        :param axes: The existing axes, in the form of {axis: [points from smallest to largest]}
+        """
+
+        self._chains = {}
+        self._largest = defaultdict(set)
+        self._smallest = defaultdict(set)
+        self._new_key = 0
+        self.changed = set()
+        self.removed = set()
+
+        for axis, points in axes.items():
+            self._chains[axis] = deque(points)
+            self._index(axis)
+
+    def __getitem__(self, key: int) -> list[int]:
+        return list(self._chains[key])
+
+    def _index(self, key: int) -> None:
+        """
+        Registers the smallest and largest points of a chain
+        :param key: The chain's key
+        """
+
+        chain = self._chains[key]
+        self._smallest[chain[0]].add(key)
+        self._largest[chain[-1]].add(key)
+
+    def _unindex(self, key: int) -> None:
+        """
+        Unregisters the smallest and largest points of a chain
+        :param key: The chain's key
+        """
+
+        chain = self._chains[key]
+        self._smallest[chain[0]].discard(key)
+        self._largest[chain[-1]].discard(key)
+
+    def _join(self, key: int, other: int) -> None:
+        """
+        Appends a chain after another chain, keeping the longer chain's key like
+        `Axis.join` keeps the larger axis
+        :param key: The chain to append to
+        :param other: The chain to append
+        """
+
+        self._unindex(key)
+        self._unindex(other)
+
+        if len(self._chains[other]) <= len(self._chains[key]):
+            self._chains[key].extend(self._chains.pop(other))
+        else:
+            self._chains[other].extendleft(reversed(self._chains.pop(key)))
+            key, other = other, key
+
+        self._index(key)
+
+        self.changed.add(key)
+        self.changed.discard(other)
+        if other > 0:
+            self.removed.add(other)
+
+    def add_order(self, large: int, small: int) -> None:
+        """
+        Applies an order to the chains the same way `Analyzer.analyze_order` applies it to
+        the database
+        :param large: The larger point
+        :param small: The smaller point
+        """
+
+        large_matches = self._smallest[large]
+        small_matches = self._largest[small]
+
+        if len(large_matches) == len(small_matches) == 1:
+            (key,), (other,) = small_matches, large_matches
+            # Closing a chain on itself is a contradiction and carries no usable order
+            if key != other:
+                self._join(key, other)
+
+        elif len(large_matches) == 1:
+            (key,) = large_matches
+            self._unindex(key)
+            self._chains[key].appendleft(small)
+            self._index(key)
+            self.changed.add(key)
+
+        elif len(small_matches) == 1:
+            (key,) = small_matches
+            self._unindex(key)
+            self._chains[key].append(large)
+            self._index(key)
+            self.changed.add(key)
+
+        else:
+            self._new_key -= 1
+            self._chains[self._new_key] = deque((small, large))
+            self._index(self._new_key)
+            self.changed.add(self._new_key)
+
+
+class DisjointSets(Generic[Item]):
+    """Groups items into disjoint sets as pairs of items are joined (union-find)"""
+
+    _parents: dict[Item, Item]
+
+    def __init__(self) -> None:
+        self._parents = {}
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self._parents)
+
+    def find(self, item: Item) -> Item:
+        """
+        Finds the representative item of an item's set
+        :param item: The item
+        :return: The representative item
+        """
+
+        self._parents.setdefault(item, item)
+
+        while (parent := self._parents[item]) != item:
+            self._parents[item] = self._parents[parent]
+            item = parent
+
+        return item
+
+    def union(self, first: Item, second: Item) -> None:
+        """
+        Joins the sets of two items
+        :param first: An item of the first set
+        :param second: An item of the second set
+        """
+
+        self._parents[self.find(first)] = self.find(second)
+
+
+class OrderConflict(Exception):
+    """Raised when an order contradicts the orders that are already known"""
+
+    chain: list[int]
+
+    def __init__(self, chain: list[int]) -> None:
+        """
+        :param chain: The contradicting points, each larger than the next
+        """
+
+        super().__init__(f'Order contradicts the chain {chain}')
+        self.chain = chain
+
+
+class Topology:
+    """
+    Keeps the points in a topological order, from larger to smaller, as orders are added.
+    Each new order only reorders the points between its two points (Pearce-Kelly).
+    """
+
+    _larger: defaultdict[int, set[int]]
+    _next_index: int
+    _order: dict[int, int]
+    _smaller: defaultdict[int, set[int]]
+
+    def __init__(self) -> None:
+        self._larger = defaultdict(set)
+        self._next_index = 0
+        self._order = {}
+        self._smaller = defaultdict(set)
+
+    def _chain(self, reached: dict[int, int | None], point: int) -> list[int]:
+        """
+        Follows a search back from a reached point
+        :param reached: The search's result, in the form of {point: previous point}
+        :param point: The reached point
+        :return: The points from the search's start to the reached point
+        """
+
+        chain = [point]
+        while (previous := reached[chain[-1]]) is not None:
+            chain.append(previous)
+
+        return chain[::-1]
+
+    def _index(self, point: int) -> int:
+        """
+        Fetches the point's position in the order, placing new points last
+        :param point: The point
+        :return: The point's position
+        """
+
+        if point not in self._order:
+            self._order[point] = self._next_index
+            self._next_index += 1
+
+        return self._order[point]
+
+    def _search(
+        self, start: int, edges: defaultdict[int, set[int]], within: range
+    ) -> dict[int, int | None]:
+        """
+        Finds the points reachable from a point, only through points positioned within a range
+        :param start: The point to search from
+        :param edges: The edges to search through
+        :param within: The range of positions to search in
+        :return: The reached points, in the form of {point: previous point}
+        """
+
+        reached: dict[int, int | None] = {start: None}
+        stack = [start]
+
+        while stack:
+            point = stack.pop()
+            for following in edges[point]:
+                if following not in reached and self._order[following] in within:
+                    reached[following] = point
+                    stack.append(following)
+
+        return reached
+
+    def add(self, large: int, small: int) -> None:
+        """
+        Adds an order, reordering the affected points
+        :param large: The larger point
+        :param small: The smaller point
+        :raise OrderConflict: If the order contradicts the known orders
+        """
+
+        if large == small:
+            raise OrderConflict([small])
+
+        large_index, small_index = self._index(large), self._index(small)
+
+        if large_index > small_index:
+            affected = range(small_index, large_index + 1)
+
+            following = self._search(small, self._smaller, affected)
+            if large in following:
+                raise OrderConflict(self._chain(following, large))
+
+            preceding = self._search(large, self._larger, affected)
+
+            points = sorted(preceding, key=self._order.__getitem__) + sorted(
+                following, key=self._order.__getitem__
+            )
+            indexes = sorted(self._order[point] for point in points)
+
+            self._order.update(zip(points, indexes))
+
+        self._smaller[large].add(small)
+        self._larger[small].add(large)
+
+    def conflict(self, large: int, small: int) -> list[int]:
+        """
+        Finds the chain of known orders that contradicts an order
+        :param large: The larger point
+        :param small: The smaller point
+        :return: The contradicting points from small to large, each larger than the next,
+            or an empty list if the order is consistent
+        """
+
+        if large == small:
+            return [small]
+
+        if large not in self._order or small not in self._order:
+            return []
+
+        if self._order[large] < self._order[small]:
+            return []
+
+        following = self._search(
+            small, self._smaller, range(self._order[small], self._order[large] + 1)
+        )
+
+        return self._chain(following, large) if large in following else []
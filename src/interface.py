@@ -3,7 +3,6 @@
 from re import match
 from socket import gethostname
 
-from mariadb import Error
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (
@@ -18,7 +17,8 @@ from PyQt6.QtWidgets import (
 )
 
 from .archive import Archive
-from .registry import get_archive_password, get_key, set_connection
+from .backends import DatabaseError, MariaDB
+from .registry import get_archive_password, get_key, get_replica, set_connection
 
 
 class MainWindow(QMainWindow):
@@ -33,7 +33,8 @@ class MainWindow(QMainWindow):
     def __init__(self) -> None:
         super().__init__()
 
-        self.archive = Archive()
+        replica = get_replica()
+        self.archive = Archive(replica=MariaDB(replica) if replica else None)
         self.setWindowTitle('Archivist Administer User Interface')
         self.setFixedSize(400, 300)
 
@@ -94,7 +95,7 @@ class MainWindow(QMainWindow):
             success.setText('Connected to database.')
             success.exec()
 
-        except Error:
+        except DatabaseError:
             error = QMessageBox()
             error.setIcon(QMessageBox.Icon.Critical)
             error.setWindowTitle('Error')
@@ -0,0 +1,117 @@
+"""Versioned changes to the schema of existing archives"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any
+
+from .backends import DatabaseError
+from .cells import Cell, UnsignedInt
+
+if TYPE_CHECKING:
+    from .database import Database
+
+MIGRATION_CHUNK = 10000
+
+
+def _add_indexes(database: Database) -> None:
+    """Adds the secondary indexes declared on the tables"""
+
+    database.create_indexes()
+
+
+def _index_names(database: Database) -> None:
+    """Indexes the names of categories and documents, which their listings are paged by"""
+
+    for table in ('categories', 'documents'):
+        for statement in database[table].create_indexes():
+            statement.execute()
+
+
+def _track_touched_axes(database: Database) -> None:
+    """
+    Adds the table of the axes touched since useless axes were last removed, listing every
+    axis, since earlier versions kept the touched axes in memory only
+    """
+
+    with suppress(DatabaseError):
+        database['touched_axes'].create().execute()
+
+    database.statement('INSERT INTO touched_axes (axis) SELECT id FROM axes').execute()
+
+
+# Each migration brings an archive from its index to the following version. Migrations
+# must be safe to run again, since DDL statements commit on their own.
+MIGRATIONS: list[Callable[[Database], None]] = [
+    _add_indexes,
+    _index_names,
+    _track_touched_axes,
+]
+
+
+def alter_online(database: Database, table: str, alteration: str) -> None:
+    """
+    Alters a table without locking it against reads and writes, failing instead of locking
+    if the alteration cannot run online
+    :param database: The archive's database
+    :param table: The table to alter
+    :param alteration: The alter specification, e.g. 'ADD COLUMN IF NOT EXISTS ...'
+    """
+
+    database.statement(f'ALTER TABLE {table} {alteration}, LOCK=NONE').execute()
+
+
+def get_version(database: Database) -> int:
+    """
+    Fetches the schema version of an archive, recording version 0 for archives created
+    before versioning
+    :param database: The archive's database
+    :return: The schema version
+    """
+
+    try:
+        rows = database['schema_version'].select('version').execute()
+    except DatabaseError:
+        database['schema_version'].create().execute()
+        rows = []
+
+    if not rows:
+        database['schema_version'].insert(version=UnsignedInt(0)).execute()
+        return 0
+
+    return rows[0]['version']
+
+
+def migrate(database: Database) -> None:
+    """
+    Runs the migrations an archive is missing, in order, committing after each one
+    :param database: The archive's database
+    """
+
+    current = get_version(database)
+
+    for version, migration in enumerate(MIGRATIONS[current:], current + 1):
+        migration(database)
+        database['schema_version'].set(version=UnsignedInt(version)).execute()
+        database.commit()
+
+
+def update_in_chunks(
+    database: Database, table: str, **columns: Cell[Any] | str
+) -> None:
+    """
+    Updates all rows of a table in chunks of consecutive IDs, committing after each chunk,
+    so other connections are never blocked for long
+    :param database: The archive's database
+    :param table: The table to update
+    :param columns: The values to set, in the form of column=value
+    """
+
+    largest = database[table].select('MAX(id)').execute()[0]['MAX(id)'] or 0
+
+    for start in range(1, largest + 1, MIGRATION_CHUNK):
+        database[table].set(**columns).where(
+            id=range(start, start + MIGRATION_CHUNK)
+        ).execute()
+        database.commit()
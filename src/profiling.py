@@ -0,0 +1,167 @@
+"""Timing and counting of the statements run on the database"""
+
+from __future__ import annotations
+
+from collections import Counter, deque
+from collections.abc import Sequence
+from functools import lru_cache
+from logging import getLogger
+from re import compile as compile_pattern
+from threading import Lock
+from typing import Any
+
+# Statements that take longer than this many seconds are logged
+SLOW_STATEMENT = 0.5
+
+# The amount of recent durations kept per statement shape to estimate percentiles
+DURATION_SAMPLES = 1000
+
+# The amount of statements whose shapes are remembered, since statement texts repeat
+SHAPES = 1024
+
+LITERALS = compile_pattern(r"\b\d+\b|'[^']*'")
+PARAMETER_LISTS = compile_pattern(r'\?(?:, \?)+')
+ROW_LISTS = compile_pattern(r'(\([^()]*\))(?:, \1)+')
+
+logger = getLogger(__name__)
+
+
+@lru_cache(maxsize=SHAPES)
+def shape(statement: str) -> str:
+    """
+    Finds the shape of a statement, which is shared by statements that only differ in their
+    literal values and in the lengths of their parameter lists
+    :param statement: The statement
+    :return: The statement's shape
+    """
+
+    return ROW_LISTS.sub(
+        r'\1, ...', PARAMETER_LISTS.sub('?, ...', LITERALS.sub('?', statement))
+    )
+
+
+class StatementStatistics:
+    """The measurements of the statements of a single shape"""
+
+    calls: int
+    durations: deque[float]
+    rows: int
+    total: float
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.durations = deque(maxlen=DURATION_SAMPLES)
+        self.rows = 0
+        self.total = 0
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Estimates a percentile of the durations from the recent durations
+        :param fraction: The percentile, between 0 and 1
+        :return: The duration in seconds
+        """
+
+        durations = sorted(self.durations)
+        return durations[min(int(fraction * len(durations)), len(durations) - 1)]
+
+    def summary(self) -> dict[str, float | int]:
+        """
+        :return: The measurements, in the form of {'calls': calls, 'rows': rows,
+            'total': seconds, 'p50': seconds, 'p95': seconds, 'p99': seconds}
+        """
+
+        return {
+            'calls': self.calls,
+            'rows': self.rows,
+            'total': self.total,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+        }
+
+
+class Profiler:
+    """
+    Records the calls, durations and rows of each statement shape, and logs slow statements
+    without their parameters. `statement_cache` counts the statements that reused a prepared
+    statement as hits.
+    """
+
+    _lock: Lock
+    _statistics: dict[str, StatementStatistics]
+    slow: float
+    statement_cache: Counter[str]
+
+    def __init__(self, slow: float = SLOW_STATEMENT) -> None:
+        """
+        :param slow: The duration in seconds above which statements are logged
+        """
+
+        self._lock = Lock()
+        self._statistics = {}
+        self.slow = slow
+        self.statement_cache = Counter(hits=0, misses=0)
+
+    def add_rows(self, statement: str, rows: int) -> None:
+        """
+        Adds the rows of a recorded query once they are fetched
+        :param statement: The query
+        :param rows: The amount of rows fetched
+        """
+
+        with self._lock:
+            self._statistics[shape(statement)].rows += rows
+
+    def record(
+        self, statement: str, params: Sequence[Any], duration: float, rows: int
+    ) -> None:
+        """
+        Records a run of a statement
+        :param statement: The statement
+        :param params: The statement's parameters, which are never recorded
+        :param duration: The statement's duration in seconds
+        :param rows: The amount of rows the statement returned or affected
+        """
+
+        statement_shape = shape(statement)
+
+        with self._lock:
+            statistics = self._statistics.setdefault(
+                statement_shape, StatementStatistics()
+            )
+            statistics.calls += 1
+            statistics.durations.append(duration)
+            statistics.rows += max(rows, 0)
+            statistics.total += duration
+
+        if duration > self.slow:
+            logger.warning(
+                'Slow statement (%.3fs, %d rows, %d parameters redacted): %s',
+                duration,
+                rows,
+                len(params),
+                statement_shape,
+            )
+
+    def reset(self) -> None:
+        """Forgets all measurements"""
+
+        with self._lock:
+            self._statistics = {}
+            self.statement_cache = Counter(hits=0, misses=0)
+
+    def summary(self) -> dict[str, dict[str, float | int]]:
+        """
+        :return: The measurements of each statement shape, see `StatementStatistics.summary`,
+            from the shape with the longest total duration
+        """
+
+        with self._lock:
+            summaries = {
+                statement_shape: statistics.summary()
+                for statement_shape, statistics in self._statistics.items()
+            }
+
+        return dict(
+            sorted(summaries.items(), key=lambda item: item[1]['total'], reverse=True)
+        )
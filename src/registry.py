@@ -66,6 +66,19 @@ def get_key() -> str:
         return QueryValueEx(archivist, 'Key')[0]
 
 
+def get_replica() -> str:
+    """
+    Fetches the DSN of the database's read replica from the registry
+    :return: The DSN, or an empty string if there is no replica
+    """
+
+    with OpenKeyEx(HKEY_CURRENT_USER, r'SOFTWARE\\Archivist\\') as archivist:
+        try:
+            return QueryValueEx(archivist, 'Replica')[0]
+        except FileNotFoundError:
+            return ''
+
+
 def set_connection(username: str, password: str, database: str) -> None:
     """
     Sets the connection registry keys
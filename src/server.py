@@ -3,16 +3,29 @@
 from json import dumps, loads
 from socket import AF_INET, SOCK_STREAM, gethostname, socket
 from time import sleep
-from typing import Any
+from typing import Any, get_args
 
 from cryptography.fernet import Fernet
-from mariadb import Error as MariaDBError
 
+from .analyzer import Engine
+from .archive import PAGE_SIZE, InvalidPage
+from .backends import DatabaseError
+from .database import Route
+from .graph import OrderConflict
 from .interface import window
 from .registry import generate_key, get_archive_password, get_database, get_key
 
 PORT = 8626
 
+# The key each listing message answers with, which is empty if its page can't be read
+LISTINGS = {
+    'get_categories': 'categories',
+    'get_category_and_elements': 'elements',
+    'get_document_and_elements': 'elements',
+    'get_document_and_points': 'points',
+    'get_documents': 'documents',
+}
+
 
 def handle(connection: socket, data: bytes) -> None:
     """
@@ -28,176 +41,204 @@ def handle(connection: socket, data: bytes) -> None:
     if 'password' in message:
         message['password'] = fernet.decrypt(message['password']).decode()
 
-    try:
-        match message['message']:
-            case 'add_category':
-                success = True
-                if message['password'] == get_archive_password():
-                    try:
-                        category = window.archive.new_category(message['name'])
-                        for property_name in message['properties']:
-                            category.new_property(property_name)
-                        window.archive.commit()
-                    except MariaDBError:
+    # Reads are routed automatically unless the request asks for a route, see `Database.route`
+    route = message.get('route')
+
+    with window.archive.route(route if route in get_args(Route) else None):
+        try:
+            match message['message']:
+                case 'add_category':
+                    success = True
+                    if message['password'] == get_archive_password():
+                        try:
+                            with window.archive.transaction():
+                                category = window.archive.new_category(message['name'])
+                                for property_name in message['properties']:
+                                    category.new_property(property_name)
+                        except DatabaseError:
+                            success = False
+                    else:
                         success = False
-                else:
-                    success = False
-                response.update({'success': success})
-            case 'add_description':
-                success = True
-                if message['password'] == get_archive_password():
-                    assert isinstance(message['document'], int)
-                    assert isinstance(message['element'], int)
-                    try:
-                        window.archive.document(
-                            message['document']
-                        ).declare_description(
-                            window.archive.element(message['element']),
-                            message['description'],
-                        )
-                        window.archive.commit()
-                    except (MariaDBError, AssertionError):
+                    response.update({'success': success})
+                case 'add_description':
+                    success = True
+                    if message['password'] == get_archive_password():
+                        assert isinstance(message['document'], int)
+                        assert isinstance(message['element'], int)
+                        try:
+                            with window.archive.transaction():
+                                window.archive.document(
+                                    message['document']
+                                ).declare_description(
+                                    window.archive.element(message['element']),
+                                    message['description'],
+                                )
+                        except (DatabaseError, AssertionError):
+                            success = False
+                    else:
                         success = False
-                else:
-                    success = False
-                response.update({'success': success})
-            case 'add_document':
-                success = True
-                if message['password'] == get_archive_password():
-                    try:
-                        window.archive.new_document(message['name'])
-                        window.archive.commit()
-                    except MariaDBError:
+                    response.update({'success': success})
+                case 'add_document':
+                    success = True
+                    if message['password'] == get_archive_password():
+                        try:
+                            with window.archive.transaction():
+                                window.archive.new_document(message['name'])
+                        except DatabaseError:
+                            success = False
+                    else:
                         success = False
-                else:
-                    success = False
-                response.update({'success': success})
-            case 'add_element':
-                success = True
-                if message['password'] == get_archive_password():
-                    try:
-                        assert isinstance(message['category'], int)
-                        window.archive.new_element(
-                            window.archive.category(message['category'])
-                        )
-                        window.archive.commit()
-                    except (MariaDBError, AssertionError):
+                    response.update({'success': success})
+                case 'add_element':
+                    success = True
+                    if message['password'] == get_archive_password():
+                        try:
+                            with window.archive.transaction():
+                                assert isinstance(message['category'], int)
+                                window.archive.new_element(
+                                    window.archive.category(message['category'])
+                                )
+                        except (DatabaseError, AssertionError):
+                            success = False
+                    else:
                         success = False
-                else:
-                    success = False
-                response.update({'success': success})
-            case 'add_order':
-                success = True
-                if message['password'] == get_archive_password():
-                    try:
-                        assert isinstance(message['document'], int)
-                        assert isinstance(message['large'], int)
-                        assert isinstance(message['small'], int)
-                        window.archive.document(message['document']).declare_order(
-                            window.archive.point(message['large']),
-                            window.archive.point(message['small']),
-                        )
-                        window.archive.commit()
-                    except (MariaDBError, AssertionError):
+                    response.update({'success': success})
+                case 'add_order':
+                    success = True
+                    if message['password'] == get_archive_password():
+                        try:
+                            with window.archive.transaction():
+                                assert isinstance(message['document'], int)
+                                assert isinstance(message['large'], int)
+                                assert isinstance(message['small'], int)
+                                window.archive.document(
+                                    message['document']
+                                ).declare_order(
+                                    window.archive.point(message['large']),
+                                    window.archive.point(message['small']),
+                                )
+                        except (DatabaseError, AssertionError):
+                            success = False
+                        except OrderConflict as conflict:
+                            success = False
+                            response.update({'conflict': conflict.chain})
+                    else:
                         success = False
-                else:
-                    success = False
-                response.update({'success': success})
-            case 'add_order_rule':
-                success = True
-                if message['password'] == get_archive_password():
-                    try:
-                        assert isinstance(message['large'], int)
-                        assert isinstance(message['small'], int)
-                        window.archive.add_order_rule(
-                            window.archive.property(message['large']),
-                            window.archive.property(message['small']),
-                        )
-                        window.archive.commit()
-                    except (MariaDBError, AssertionError):
+                    response.update({'success': success})
+                case 'add_order_rule':
+                    success = True
+                    if message['password'] == get_archive_password():
+                        try:
+                            with window.archive.transaction():
+                                assert isinstance(message['large'], int)
+                                assert isinstance(message['small'], int)
+                                window.archive.add_order_rule(
+                                    window.archive.property(message['large']),
+                                    window.archive.property(message['small']),
+                                )
+                        except (DatabaseError, AssertionError):
+                            success = False
+                    else:
                         success = False
-                else:
-                    success = False
-                response.update({'success': success})
-            case 'analyze':
-                success = True
-                if message['password'] == get_archive_password():
-                    try:
-                        window.archive.analyze_rules()
-                        window.archive.commit()
-                    except MariaDBError:
+                    response.update({'success': success})
+                case 'analyze':
+                    success = True
+                    if message['password'] == get_archive_password():
+                        try:
+                            with window.archive.transaction():
+                                engine = message.get('engine', 'sequential')
+                                assert engine in get_args(Engine)
+                                response.update(
+                                    {'conflicts': window.archive.analyze_rules(engine)}
+                                )
+                        except (DatabaseError, AssertionError):
+                            success = False
+                    else:
                         success = False
-                else:
-                    success = False
-                response.update({'success': success})
-            case 'connect_user':
-                response.update(
-                    {'success': message['password'] == get_archive_password()}
-                )
-            case 'get_axes':
-                response.update({'axes': window.archive.get_axes()})
-            case 'get_axis':
-                assert isinstance(message['id'], int)
-                response.update({'points': window.archive.get_axis(message['id'])})
-            case 'get_categories':
-                response.update({'categories': window.archive.get_categories()})
-            case 'get_category':
-                assert isinstance(message['id'], int)
-                category = window.archive.category(message['id'])
-                response.update(
-                    {
-                        'name': category.get_name(),
-                        'properties': category.get_property_names(),
-                        'order_rules': category.get_order_rules(),
-                    }
-                )
-            case 'get_category_and_elements':
-                assert isinstance(message['id'], int)
-                category = window.archive.category(message['id'])
-                response.update(
-                    {'name': category.get_name(), 'elements': category.get_elements()}
-                )
-            case 'get_category_and_properties':
-                assert isinstance(message['id'], int)
-                category = window.archive.category(message['id'])
-                response.update(
-                    {
-                        'name': category.get_name(),
-                        'properties': category.get_properties(),
-                    }
-                )
-            case 'get_database_name':
-                response.update({'name': get_database()})
-            case 'get_document':
-                document = window.archive.document(message['id'])
-                response.update(
-                    {
-                        'name': document.get_name(),
-                        'orders': document.get_orders(),
-                    }
-                )
-            case 'get_document_and_elements':
-                assert isinstance(message['id'], int)
-                response.update(
-                    {
-                        'name': window.archive.document(message['id']).get_name(),
-                        'elements': window.archive.get_elements(),
-                    }
-                )
-            case 'get_document_and_points':
-                assert isinstance(message['id'], int)
-                response.update(
-                    {
-                        'name': window.archive.document(message['id']).get_name(),
-                        'points': window.archive.get_points(),
-                    }
-                )
-            case 'get_documents':
-                response.update({'documents': window.archive.get_documents()})
-            case _:
-                pass
-    except MariaDBError:
-        pass
+                    response.update({'success': success})
+                case 'connect_user':
+                    response.update(
+                        {'success': message['password'] == get_archive_password()}
+                    )
+                case 'get_axes':
+                    response.update({'axes': window.archive.get_axes()})
+                case 'get_axis':
+                    assert isinstance(message['id'], int)
+                    response.update({'points': window.archive.get_axis(message['id'])})
+                case 'get_categories':
+                    listing, next_token = window.archive.get_categories_page(
+                        *page(message)
+                    )
+                    response.update({'categories': listing, 'next': next_token})
+                case 'get_category':
+                    assert isinstance(message['id'], int)
+                    category = window.archive.category(message['id'])
+                    response.update(
+                        {
+                            'name': category.get_name(),
+                            'properties': category.get_property_names(),
+                            'order_rules': category.get_order_rules(),
+                        }
+                    )
+                case 'get_category_and_elements':
+                    assert isinstance(message['id'], int)
+                    category = window.archive.category(message['id'])
+                    response.update({'name': category.get_name()})
+                    listing, next_token = category.get_elements_page(*page(message))
+                    response.update({'elements': listing, 'next': next_token})
+                case 'get_category_and_properties':
+                    assert isinstance(message['id'], int)
+                    category = window.archive.category(message['id'])
+                    response.update(
+                        {
+                            'name': category.get_name(),
+                            'properties': category.get_properties(),
+                        }
+                    )
+                case 'get_database_name':
+                    response.update({'name': get_database()})
+                case 'get_document':
+                    document = window.archive.document(message['id'])
+                    response.update(
+                        {
+                            'name': document.get_name(),
+                            'orders': document.get_orders(),
+                        }
+                    )
+                case 'get_document_and_elements':
+                    assert isinstance(message['id'], int)
+                    response.update(
+                        {'name': window.archive.document(message['id']).get_name()}
+                    )
+                    listing, next_token = window.archive.get_elements_page(
+                        *page(message)
+                    )
+                    response.update({'elements': listing, 'next': next_token})
+                case 'get_document_and_points':
+                    assert isinstance(message['id'], int)
+                    response.update(
+                        {'name': window.archive.document(message['id']).get_name()}
+                    )
+                    listing, next_token = window.archive.get_points_page(*page(message))
+                    response.update({'points': listing, 'next': next_token})
+                case 'get_documents':
+                    listing, next_token = window.archive.get_documents_page(
+                        *page(message)
+                    )
+                    response.update({'documents': listing, 'next': next_token})
+                case 'get_statement_statistics':
+                    success = message['password'] == get_archive_password()
+                    if success:
+                        response.update(
+                            {'statements': window.archive.get_statement_statistics()}
+                        )
+                    response.update({'success': success})
+                case _:
+                    pass
+        except (DatabaseError, InvalidPage) as error:
+            response.update({'error': str(error)})
+            if message['message'] in LISTINGS:
+                response.update({LISTINGS[message['message']]: [], 'next': None})
 
     connection.sendall(dumps(response).encode())
 
@@ -231,6 +272,22 @@ def listen() -> None:
                     pass
 
 
+def page(message: dict[str, Any]) -> tuple[int, str | None]:
+    """
+    Reads the page a message requests of a listing
+    :param message: The message, with an optional 'size' and continuation 'token'
+    :return: The page's size and continuation token
+    :raise InvalidPage: If the size or the token has the wrong type
+    """
+
+    size, token = message.get('size', PAGE_SIZE), message.get('token')
+
+    if not isinstance(size, int) or not isinstance(token, str | None):
+        raise InvalidPage(f'Invalid page size {size!r} or token {token!r}')
+
+    return size, token
+
+
 def send(connection: socket, data: dict[str, Any]) -> None:
     """
     Sends data via sockets
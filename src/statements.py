@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Generator, Hashable, Iterable, Sequence
+from functools import lru_cache
+from json import dumps
 from typing import TYPE_CHECKING, Any, Self
 
 from .cells import Cell
@@ -10,6 +12,64 @@ from .cells import Cell
 if TYPE_CHECKING:
     from .database import Database
 
+Condition = Cell[Any] | str | tuple[Cell[Any], ...] | range
+
+STREAM_BATCH = 1000
+
+# Longer lists of values are passed as a single JSON array and joined through JSON_TABLE,
+# which keeps the statement short and its text the same whatever the list's length
+LIST_PARAMS = 1000
+
+# The amount of compiled WHERE clauses and SELECT heads remembered, by their shapes
+COMPILED_SHAPES = 1024
+
+
+@lru_cache(maxsize=COMPILED_SHAPES)
+def compile_conditions(shapes: tuple[tuple[str, Hashable], ...]) -> str:
+    """
+    Compiles the text of conditions that must all be met, which only depends on their
+    columns and the shapes of their values, see `DataStatement._condition`.
+    `compile_conditions.cache_info()` counts the hits and misses.
+    :param shapes: The conditions, each in the form of (column, shape)
+    :return: The condition string
+    """
+
+    clauses: list[str] = []
+
+    for column, (kind, detail) in shapes:
+        if kind == 'range':
+            clauses.append(f'{column} BETWEEN ? AND ?')
+        elif kind == 'json':
+            clauses.append(
+                f'{column} IN (SELECT value FROM JSON_TABLE('
+                f"?, '$[*]' COLUMNS (value {detail} PATH '$')) AS list_values)"
+            )
+        elif kind == 'list':
+            clauses.append(f'{column} IN ({", ".join("?" * detail)})')
+        elif kind == 'cell':
+            clauses.append(f'{column} {"!=" if detail else "="} ?')
+        elif detail[0] == '!':
+            clauses.append(f'{column} != {detail[1:]}')
+        else:
+            clauses.append(f'{column} = {detail}')
+
+    return ' AND '.join(clauses)
+
+
+@lru_cache(maxsize=COMPILED_SHAPES)
+def compile_select(references: str, columns: tuple[str | None, ...]) -> str:
+    """
+    Compiles the head of a SELECT statement
+    :param references: The table references to select from
+    :param columns: The columns to select, None standing for a parameter
+    :return: The statement's text up to its WHERE clause
+    """
+
+    return (
+        f'SELECT {", ".join("?" if column is None else column for column in columns)}'
+        f' FROM {references}'
+    )
+
 
 class Statement:
     """Represents an SQL statement"""
@@ -47,7 +107,43 @@ class Statement:
     def execute(self) -> None:
         """Executes the statement"""
 
-        self._database.execute(str(self), self._get_params())
+        self._database.execute(str(self), self._get_params(), self.read_only)
+
+    @property
+    def read_only(self) -> bool:
+        """Whether the statement only reads, so it can run on a replica"""
+
+        return False
+
+
+class Insert(Statement):
+    """Represents an INSERT statement"""
+
+    _returning: str = ''
+
+    def __str__(self) -> str:
+        return super().__str__() + self._returning
+
+    def execute(self) -> list[tuple[Any, ...]]:
+        """
+        Executes the INSERT statement and returns the inserted rows' returned columns
+        :return: A list of rows in no promised order, each as a tuple of the returned
+            columns, or an empty list if no columns are returned
+        """
+
+        super().execute()
+
+        return self._database.fetch() if self._returning else []
+
+    def returning(self, *columns: str) -> Self:
+        """
+        Adds a RETURNING clause to the statement
+        :param columns: The columns of the inserted rows to return
+        :return: This statement
+        """
+
+        self._returning = f' RETURNING {", ".join(columns)}'
+        return self
 
 
 class DataStatement(Statement):
@@ -63,7 +159,7 @@ class DataStatement(Statement):
     def __str__(self) -> str:
         return (
             super().__str__()
-            + self._where
+            + (f' WHERE {self._where}' if self._where else '')
             + self._group_by
             + self._order_by
             + self._limit
@@ -76,6 +172,31 @@ class DataStatement(Statement):
             + (self._limit_count is not None) * (self._limit_count,)
         )
 
+    def after(self, columns: Sequence[str], key: Sequence[Any]) -> Self:
+        """
+        Adds a condition to the WHERE clause that skips the rows up to and including a key,
+        so a page of rows ordered by the key's columns is found through their index rather
+        than by counting rows like OFFSET. Must be called after `where`.
+        :param columns: The columns of the key, from the most significant
+        :param key: The key's values, e.g. those of the last row of the previous page
+        :return: This statement
+        """
+
+        *leading, last = columns
+        clause = f'{last} > ?'
+        params: list[Any] = [key[-1]]
+
+        # (a, b) > (x, y) is written as a >= x AND (a > x OR b > y), whose leading bound
+        # lets the database seek through the index, unlike a > x OR (a = x AND b > y)
+        for column, value in zip(reversed(leading), reversed(key[:-1])):
+            clause = f'{column} >= ? AND ({column} > ? OR {clause})'
+            params = [value, value, *params]
+
+        self._where = f'({self._where}) AND ({clause})' if self._where else clause
+        self._where_params += tuple(params)
+
+        return self
+
     def group_by(self, column: str) -> Self:
         """
         Modifies the statement's GROUP BY clause
@@ -108,23 +229,22 @@ class DataStatement(Statement):
         self._order_by = f' ORDER BY {column}' + (' DESC' if descending else '')
         return self
 
-    def where(self, **conditions: Cell[Any] | str | tuple[Cell[Any], ...]) -> Self:
+    def where(self, **conditions: Condition) -> Self:
         """
         Modifies the WHERE clause of the statement
         :param conditions: The conditions that must be met, in the form of column=value.
-            value may be either a cell, a string or a tuple of cells to match at least one.
+            value may be either a cell, a string, a tuple of cells to match at least one,
+            or a range of values the column must be within.
         :return: This statement
         """
 
         string, self._where_params = type(self)._multiple_conditions(**conditions)
 
-        self._where = f' WHERE {string}'
+        self._where = string
 
         return self
 
-    def where_either(
-        self, *conditions: dict[str, Cell[Any] | str | tuple[Cell[Any], ...]]
-    ) -> Self:
+    def where_either(self, *conditions: dict[str, Condition]) -> Self:
         """
         Sets the WHERE clause of the statement to either of several lists of conditions
         :param conditions: A list of conditions of which at least one must be met
@@ -140,39 +260,41 @@ class DataStatement(Statement):
             clauses.append(f'({string})')
             params.extend(parameters)
 
-        self._where = ' WHERE ' + ' OR '.join(clauses)
+        self._where = ' OR '.join(clauses)
         self._where_params = tuple(params)
 
         return self
 
     @staticmethod
-    def _condition(
-        column: str, value: Cell[Any] | str | tuple[Cell[Any], ...]
-    ) -> tuple[str, tuple[Any, ...]]:
+    def _condition(value: Condition) -> tuple[tuple[str, Any], tuple[Any, ...]]:
         """
-        Creates a condition string that can be used with a WHERE clause
-        :param column: The column that must meet the condition
-        :param value: The value the column must have or a tuple of values
-        :return: A tuple containing the string and the params
+        Splits the value of a condition into the shape its text depends on and its params
+        :param value: The value the column must have, a tuple of values or a range
+        :return: A tuple containing the shape, in the form of (kind, detail), and the params
         """
 
-        if isinstance(value, tuple):
-            return (
-                f'{column} IN ({", ".join("?" * len(value))})',
-                tuple(value.value for value in value),
+        if isinstance(value, range):
+            return ('range', None), (value.start, value.stop - 1)
+
+        if isinstance(value, tuple) and len(value) > LIST_PARAMS:
+            values = [cell.value for cell in value]
+            column_type = (
+                'BIGINT' if all(isinstance(item, int) for item in values) else 'TEXT'
             )
 
-        if isinstance(value, Cell):
-            return f'{column} {"!=" if value.negated else "="} ?', (value.value,)
+            return ('json', column_type), (dumps(values),)
 
-        if value[0] == '!':
-            return f'{column} != {value[1:]}', ()
+        if isinstance(value, tuple):
+            return ('list', len(value)), tuple(value.value for value in value)
+
+        if isinstance(value, Cell):
+            return ('cell', value.negated), (value.value,)
 
-        return f'{column} = {value}', ()
+        return ('column', value), ()
 
     @classmethod
     def _multiple_conditions(
-        cls, **conditions: Cell[Any] | str | tuple[Cell[Any], ...]
+        cls, **conditions: Condition
     ) -> tuple[str, tuple[Any, ...]]:
         """
         Creates a condition string for meeting a list of conditions, using AND
@@ -180,15 +302,15 @@ class DataStatement(Statement):
         :return: A tuple containing the condition string the params
         """
 
-        clauses: list[str] = []
+        shapes: list[tuple[str, Hashable]] = []
         params: list[Any] = []
 
         for column, value in conditions.items():
-            clause, new_params = cls._condition(column, value)
-            clauses.append(clause)
+            shape, new_params = cls._condition(value)
+            shapes.append((column, shape))
             params.extend(new_params)
 
-        return ' AND '.join(clauses), tuple(params)
+        return compile_conditions(tuple(shapes)), tuple(params)
 
 
 class Select(DataStatement):
@@ -202,8 +324,12 @@ class Select(DataStatement):
     ) -> None:
         super().__init__(
             database,
-            f'SELECT {", ".join(column if isinstance(column, str) else "?" for column in columns)}'
-            f' FROM {references}',
+            compile_select(
+                references,
+                tuple(
+                    column if isinstance(column, str) else None for column in columns
+                ),
+            ),
             (column for column in columns if isinstance(column, int)),
         )
 
@@ -223,6 +349,10 @@ class Select(DataStatement):
         self._into = f'INSERT INTO {table} ({", ".join(columns)}) '
         return self
 
+    @property
+    def read_only(self) -> bool:
+        return not self._into
+
     def execute(self) -> list[dict[str | int, Any]]:
         """
         Executes the SELECT statement and returns the results
@@ -239,3 +369,41 @@ class Select(DataStatement):
                 for row in self._database.fetch()
             ]
         )
+
+    def execute_tuples(self) -> list[tuple[Any, ...]]:
+        """
+        Executes the SELECT statement and returns the results as they are fetched, which
+        saves building a dictionary per row
+        :return: A list of rows, each as a tuple of values in the order of the columns
+        """
+
+        super().execute()
+
+        return [] if self._into else self._database.fetch()
+
+    def stream(
+        self, batch: int = STREAM_BATCH
+    ) -> Generator[dict[str | int, Any], None, None]:
+        """
+        Executes the SELECT statement through a server-side cursor and yields the results,
+        fetching them in batches
+        :param batch: The amount of rows to fetch at once
+        :return: A generator of rows, each in the form of {'column': value}
+        """
+
+        for row in self.stream_tuples(batch):
+            yield {self._columns[i]: cell for i, cell in enumerate(row)}
+
+    def stream_tuples(
+        self, batch: int = STREAM_BATCH
+    ) -> Generator[tuple[Any, ...], None, None]:
+        """
+        Executes the SELECT statement through a server-side cursor and yields the results,
+        fetching them in batches
+        :param batch: The amount of rows to fetch at once
+        :return: A generator of rows, each as a tuple of values in the order of the columns
+        """
+
+        assert not self._into
+
+        return self._database.stream(str(self), self._get_params(), batch)
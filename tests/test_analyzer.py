@@ -0,0 +1,9 @@
+"""Tests `src.analyzer`"""
+
+from src.analyzer import spread
+from src.axis import LARGEST_VALUE
+
+
+def test_spread():
+    assert spread(2) == [0, LARGEST_VALUE]
+    assert spread(3) == [0, LARGEST_VALUE // 2, LARGEST_VALUE]
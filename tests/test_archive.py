@@ -1,27 +1,472 @@
 """Tests `src.archive`"""
 
-from json import load
+import sqlite3
+from contextlib import suppress
+from typing import get_args
 
-from pytest import fixture
+from pytest import fixture, mark, raises
 
-from src.archive import Archive, ArchiveConfig
+from src import database
+from src.analyzer import Engine
+from src.archive import Archive, InvalidPage, Point
+from src.backends import DatabaseError, Memory, SQLite
+from src.graph import OrderConflict
+from src.statements import LIST_PARAMS
 
 
 class TestArchive:
-    @fixture(scope='module')
-    def config(self):
-        """Returns configurations for the archive"""
+    @fixture
+    def archive(self):
+        """Returns an empty archive kept in memory"""
 
-        with open('config.json') as file:
-            return load(file)
+        archive = Archive(backend=Memory())
+        archive.connect()
+        yield archive
+        archive.close()
+
+    @fixture
+    def points(self, archive: Archive):
+        """
+        Returns the points of three described elements with a start and an end, in the form
+        of {(description, property): point}
+        """
+
+        category = archive.new_category('Event')
+        category.new_property('start')
+        category.new_property('end')
+
+        elements = archive.new_elements(category, 3)
+        archive.new_document('Source').declare_descriptions(
+            (element, f'Event {index}') for index, element in enumerate(elements)
+        )
+
+        return {
+            (point['descriptions'][0], point['property']): archive.point(point['id'])
+            for point in archive.get_points()
+        }
+
+    def test___repr__(self, archive: Archive):
+        assert repr(archive) == 'Archive()'
+
+    def test_new_elements_creates_points(self, archive: Archive, points):
+        assert len(points) == 6
+        assert [element['descriptions'] for element in archive.get_elements()] == [
+            ['Event 0'],
+            ['Event 1'],
+            ['Event 2'],
+        ]
+
+    def test_add_order_rule_rejects_duplicate(self, archive: Archive, points):
+        category = archive.category(1)
+        end, start = category.property(2), category.property(1)
+        archive.add_order_rule(end, start)
+
+        with raises(DatabaseError):
+            archive.add_order_rule(end, start)
+
+    @mark.parametrize('engine', get_args(Engine))
+    def test_analyze_rules_orders_points(
+        self, archive: Archive, points: dict[tuple[str, str], Point], engine: Engine
+    ):
+        category = archive.category(1)
+        archive.add_order_rule(category.property(2), category.property(1))
+
+        assert archive.analyze_rules(engine) == []
+
+        for index in range(3):
+            start, end = (
+                points[f'Event {index}', 'start'],
+                points[f'Event {index}', 'end'],
+            )
+            assert archive.compare(start, end)['order'] == 'before'
+
+        assert archive.compare(points['Event 0', 'end'], points['Event 1', 'end']) == {
+            'order': 'unknown',
+            'axis': None,
+        }
+
+    @mark.parametrize('engine', get_args(Engine))
+    def test_analyze_rules_skips_conflicting_orders(
+        self, archive: Archive, points: dict[tuple[str, str], Point], engine: Engine
+    ):
+        start, end = points['Event 0', 'start'], points['Event 0', 'end']
+        document = archive.document(1)
+        document.declare_order(end, start)
+        document.declare_order(end, points['Event 1', 'start'])
+        category = archive.category(1)
+        archive.add_order_rule(category.property(1), category.property(2))
+
+        assert archive.analyze_rules(engine) == [[end.id.value, start.id.value]]
+        assert archive.analyze_rules(engine) == []
+
+        # The declared order stands, and the rule applies to the other elements
+        assert archive.compare(start, end)['order'] == 'before'
+        for index in (1, 2):
+            assert (
+                archive.compare(
+                    points[f'Event {index}', 'start'], points[f'Event {index}', 'end']
+                )['order']
+                == 'after'
+            )
+
+    def test_compare_many_beyond_list_params(self, archive: Archive):
+        category = archive.new_category('Event')
+        archive.add_order_rule(
+            category.new_property('end'), category.new_property('start')
+        )
+        archive.new_elements(category, LIST_PARAMS)
+        archive.analyze_rules('memory')
+
+        # Each element's points are consecutive, and its end is after its start
+        comparisons = archive.compare_many(
+            (archive.point(point), archive.point(point + 1))
+            for point in range(1, 2 * LIST_PARAMS, 2)
+        )
+
+        assert len(comparisons) == LIST_PARAMS
+        assert all(comparison['order'] != 'unknown' for comparison in comparisons)
+
+    def test_batch_rolls_back_failed_operation_alone(self, archive: Archive):
+        with archive.batch(10) as batch:
+            for name in ('Area', 'Event', 'Person'):
+                with suppress(ValueError), batch.operation():
+                    archive.new_category(name)
+                    if name == 'Event':
+                        raise ValueError
+
+        assert [category['name'] for category in archive.get_categories()] == [
+            'Area',
+            'Person',
+        ]
+
+    def test_batch_keeps_committed_operations(self, archive: Archive):
+        with raises(ValueError):
+            with archive.batch(2) as batch:
+                for name in ('Area', 'Event', 'Person'):
+                    with batch.operation():
+                        archive.new_category(name)
+                raise ValueError
+
+        assert [category['name'] for category in archive.get_categories()] == [
+            'Area',
+            'Event',
+        ]
+
+    def test_connect_again_after_drop(self, tmp_path):
+        archive = Archive(backend=SQLite(str(tmp_path / 'archive.db')))
+        archive.connect()
+        archive.new_category('Event')
+        archive.commit()
+        archive.connect()
+
+        assert len(archive.get_categories()) == 1
+
+        archive.drop()
+        archive.connect()
+
+        assert archive.get_categories() == []
+        archive.close()
+
+    def test_reset_empties_archive(self, archive: Archive):
+        archive.new_category('Event')
+        archive.commit()
+        archive.reset()
+
+        assert archive.connected
+        assert archive.get_categories() == []
+
+    def test_declare_order_extends_axis_at_both_ends(self, archive: Archive):
+        category = archive.new_category('Event')
+        category.new_property('time')
+        archive.new_elements(category, 101)
+        document = archive.new_document('Source')
+
+        # Each order adds a point after the largest or before the smallest point, more
+        # times than there are bits in a value
+        for index in range(50, 100):
+            document.declare_order(archive.point(index + 2), archive.point(index + 1))
+        for index in range(50, 0, -1):
+            document.declare_order(archive.point(index + 1), archive.point(index))
+
+        assert archive.get_axes() == [1]
+        assert all(
+            archive.compare(archive.point(point), archive.point(point + 1))['order']
+            == 'before'
+            for point in range(1, 101)
+        )
+
+    def test_declare_order_joins_into_larger_axis(self, archive: Archive):
+        category = archive.new_category('Event')
+        category.new_property('time')
+        archive.new_elements(category, 209)
+        document = archive.new_document('Source')
+
+        # Longer than the first limit the axes are counted up to
+        for first, last in ((1, 3), (4, 103), (104, 206), (207, 209)):
+            for index in range(first, last):
+                document.declare_order(archive.point(index + 1), archive.point(index))
+
+        document.declare_order(archive.point(4), archive.point(3))
+        document.declare_order(archive.point(207), archive.point(206))
+        document.declare_order(archive.point(104), archive.point(103))
+
+        assert archive.get_axes() == [3]
+        assert all(
+            archive.compare(archive.point(point), archive.point(point + 1))['order']
+            == 'before'
+            for point in range(1, 209)
+        )
+
+    def test_declare_order_rejects_conflict(
+        self, archive: Archive, points: dict[tuple[str, str], Point]
+    ):
+        document = archive.document(1)
+        first, second = points['Event 0', 'end'], points['Event 1', 'start']
+        document.declare_order(second, first)
+
+        with raises(OrderConflict):
+            document.declare_order(first, second)
+
+        assert archive.compare(first, second)['order'] == 'before'
+        assert len(document.get_orders()) == 1
+
+        # The rejected order changed nothing, so the known orders were not reloaded
+        document.declare_order(points['Event 2', 'start'], second)
+        assert (
+            archive.get_statement_statistics()[
+                'SELECT axis, point FROM analysis ORDER BY value DESC'
+            ]['calls']
+            == 1
+        )
+
+    def test_declare_order_rejects_duplicate(
+        self, archive: Archive, points: dict[tuple[str, str], Point]
+    ):
+        document = archive.document(1)
+        first, second = points['Event 0', 'end'], points['Event 1', 'start']
+        document.declare_order(second, first)
+
+        with raises(DatabaseError):
+            document.declare_order(second, first)
+
+        # The duplicate changed nothing, so the known orders were not reloaded
+        document.declare_order(points['Event 2', 'start'], second)
+        assert len(document.get_orders()) == 2
+        assert (
+            archive.get_statement_statistics()[
+                'SELECT axis, point FROM analysis ORDER BY value DESC'
+            ]['calls']
+            == 1
+        )
+
+    def test_analyze_rules_removes_shadowed_tiny_axis(self, archive: Archive):
+        category = archive.new_category('Event')
+        category.new_property('time')
+        archive.new_elements(category, 3)
+        first, second, third = (archive.point(point) for point in range(1, 4))
+        document = archive.new_document('Source')
+
+        document.declare_order(third, first)
+        document.declare_order(second, first)
+        document.declare_order(third, second)
+
+        assert archive.get_axes() == [1, 2]
+
+        archive.analyze_rules()
 
-    @fixture(scope='module')
-    def archive(self, config: ArchiveConfig):
-        """Returns the archive"""
+        assert archive.get_axes() == [2]
+        assert archive.compare(first, third) == {'order': 'before', 'axis': 2}
 
-        archive = Archive(config)
+    def test_analyze_rules_keeps_one_of_tiny_axes_sharing_ends(
+        self, archive: Archive, points: dict[tuple[str, str], Point]
+    ):
+        first, second = points['Event 0', 'end'], points['Event 1', 'start']
+        archive.document(1).declare_order(second, first)
+        archive.new_document('Other').declare_order(second, first)
+
+        assert archive.get_axes() == [1, 2]
+
+        archive.analyze_rules()
+
+        assert archive.get_axes() == [1]
+
+    def test_analyze_rules_removes_axes_touched_before_restart(self, tmp_path):
+        path = str(tmp_path / 'archive.db')
+        archive = Archive(backend=SQLite(path))
+        archive.connect()
+        category = archive.new_category('Event')
+        category.new_property('time')
+        archive.new_elements(category, 2)
+        for name in ('Source', 'Other'):
+            archive.new_document(name).declare_order(archive.point(2), archive.point(1))
+        archive.commit()
+        archive.close()
+
+        archive = Archive(backend=SQLite(path))
+        archive.connect()
+
+        assert archive.get_axes() == [1, 2]
+
+        archive.analyze_rules()
+
+        assert archive.get_axes() == [1]
+        archive.close()
+
+    def test_new_elements_removes_axes_touched_by_earlier_calls(self, archive: Archive):
+        category = archive.new_category('Event')
+        archive.add_order_rule(
+            category.new_property('end'), category.new_property('start')
+        )
+        archive.analyze_rules()
+        archive.new_elements(category, 1)
+        archive.new_document('Source').declare_order(archive.point(1), archive.point(2))
+
+        assert archive.get_axes() == [1, 2]
+
+        # The new element shares no axis with the duplicate, which was touched before
+        archive.new_elements(category, 1)
+
+        assert archive.get_axes() == [1, 3]
+
+    @mark.parametrize('size', [1, 4, 6])
+    def test_get_points_page_walks_all_points(
+        self, archive: Archive, points, size: int
+    ):
+        pages, token = [], None
+
+        while True:
+            page, token = archive.get_points_page(size, token)
+            pages.append(page)
+            if token is None:
+                break
+
+        assert all(len(page) <= size for page in pages)
+        assert [point for page in pages for point in page] == archive.get_points()
+
+    def test_get_categories_page_orders_by_name(self, archive: Archive):
+        for name in ('Event', 'Area', 'Event', 'Person'):
+            archive.new_category(name)
+
+        first, token = archive.get_categories_page(2)
+        second, last = archive.get_categories_page(2, token)
+
+        assert [category['name'] for category in first + second] == [
+            'Area',
+            'Event',
+            'Event',
+            'Person',
+        ]
+        assert first[1]['id'] != second[0]['id']
+        assert last is None
+
+    def test_get_elements_page_rejects_invalid_token(self, archive: Archive):
+        with raises(InvalidPage):
+            archive.get_elements_page(token='not a token')
+
+    def test_parallel_analysis_sees_uncommitted_orders(self, tmp_path):
+        archive = Archive(backend=SQLite(str(tmp_path / 'archive.db')))
+        archive.connect()
+        category = archive.new_category('Event')
+        end, start = category.new_property('end'), category.new_property('start')
+        archive.new_elements(category, 2)
+        archive.add_order_rule(end, start)
+        archive.analyze_rules()
+        archive.commit()
+
+        first_end, second_start = archive.point(1), archive.point(4)
+
+        with archive.transaction():
+            archive.new_document('Source').declare_order(second_start, first_end)
+            archive.add_order_rule(category.new_property('middle'), end)
+            archive.analyze_rules('parallel')
+
+        assert archive.compare(first_end, archive.point(3))['order'] == 'before'
+        archive.close()
+
+    def test_get_statement_statistics_counts_fetched_rows(self, archive: Archive):
+        for name in ('Area', 'Event', 'Person'):
+            archive.new_category(name)
+        archive.get_categories()
+
+        statistics = archive.get_statement_statistics()
+
+        assert statistics['SELECT id, name FROM categories ORDER BY name']['rows'] == 3
+        assert statistics['INSERT INTO categories (name) VALUES (?)']['rows'] == 3
+
+    def test_nested_transaction_rolls_back_alone(
+        self, archive: Archive, points: dict[tuple[str, str], Point]
+    ):
+        document = archive.document(1)
+        first, second = points['Event 0', 'end'], points['Event 1', 'start']
+
+        with archive.transaction():
+            archive.new_category('Area')
+
+            with raises(ValueError):
+                with archive.transaction():
+                    document.declare_order(second, first)
+                    raise ValueError
+
+        assert [category['name'] for category in archive.get_categories()] == [
+            'Area',
+            'Event',
+        ]
+        assert archive.compare(first, second)['order'] == 'unknown'
+
+    def test_transaction_rolls_back(self, archive: Archive):
+        with raises(ValueError):
+            with archive.transaction():
+                archive.new_category('Event')
+                raise ValueError
+
+        assert archive.get_categories() == []
+
+
+class TestReplica:
+    @fixture
+    def archive(self, tmp_path):
+        """Returns an archive whose replica is a second connection to the same file"""
+
+        path = str(tmp_path / 'archive.db')
+        archive = Archive(backend=SQLite(path), replica=SQLite(path))
+        archive.connect()
         yield archive
         archive.close()
 
-    def test___repr__(self, archive: Archive, config: ArchiveConfig):
-        assert repr(archive) == f'Archive({config["connect"]["database"]!r})'
+    def test_reads_see_own_writes(self, archive: Archive):
+        archive.new_category('Event')
+
+        assert len(archive.get_categories()) == 1
+        with archive.route('replica'):
+            assert archive.get_categories() == []
+
+    def test_replica_sees_committed_writes(self, archive: Archive):
+        archive.new_category('Event')
+        archive.commit()
+
+        with archive.route('replica'):
+            assert len(archive.get_categories()) == 1
+
+    def test_analysis_ignores_stale_replica(self, tmp_path, monkeypatch):
+        primary, stale = str(tmp_path / 'primary.db'), str(tmp_path / 'stale.db')
+
+        archive = Archive(backend=SQLite(primary))
+        archive.connect()
+        category = archive.new_category('Event')
+        end, start = category.new_property('end'), category.new_property('start')
+        archive.new_elements(category, 2)
+        archive.commit()
+        archive.close()
+
+        with sqlite3.connect(primary) as source, sqlite3.connect(stale) as target:
+            source.backup(target)
+
+        monkeypatch.setattr(database, 'REPLICA_LAG', 0)
+        archive = Archive(backend=SQLite(primary), replica=SQLite(stale))
+        archive.connect()
+        archive.add_order_rule(end, start)
+        archive.commit()
+
+        assert archive.analyze_rules() == []
+        assert archive.compare(archive.point(1), archive.point(2))['order'] == 'after'
+        archive.close()
@@ -0,0 +1,30 @@
+"""Tests `src.axis`"""
+
+from src.axis import LARGEST_VALUE, relabel, window
+
+
+def test_window():
+    assert window(5, 2) == range(4, 8)
+    assert window(LARGEST_VALUE, 32) == range(0, LARGEST_VALUE + 1)
+
+
+def test_relabel_makes_room_after_value():
+    new_values, lower, upper = relabel([5, 6, 7], range(4, 8), 6, 7, 1)
+
+    assert upper - lower > 1
+    assert sorted(new_values.values()) == list(new_values.values())
+    assert all(new_values[value] not in range(lower + 1, upper) for value in (5, 7))
+
+
+def test_relabel_keeps_axis_ends():
+    new_values, lower, upper = relabel(
+        [LARGEST_VALUE - 1],
+        range(LARGEST_VALUE - 3, LARGEST_VALUE + 1),
+        LARGEST_VALUE - 1,
+        LARGEST_VALUE,
+        1,
+    )
+
+    assert upper == LARGEST_VALUE
+    assert lower == new_values[LARGEST_VALUE - 1]
+    assert upper - lower > 1
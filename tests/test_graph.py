@@ -0,0 +1,83 @@
+"""Tests `src.graph`"""
+
+from pytest import raises
+
+from src.graph import Chains, DisjointSets, OrderConflict, Topology
+
+
+class TestChains:
+    def test_add_order_creates_axis(self):
+        chains = Chains({})
+        chains.add_order(2, 1)
+
+        assert chains.changed == {-1}
+        assert chains[-1] == [1, 2]
+
+    def test_add_order_extends_axis(self):
+        chains = Chains({7: [1, 2]})
+        chains.add_order(3, 2)
+        chains.add_order(1, 0)
+
+        assert chains.changed == {7}
+        assert chains[7] == [0, 1, 2, 3]
+
+    def test_add_order_joins_axes(self):
+        chains = Chains({7: [1, 2], 8: [3, 4]})
+        chains.add_order(3, 2)
+
+        assert chains.changed == {7}
+        assert chains.removed == {8}
+        assert chains[7] == [1, 2, 3, 4]
+
+    def test_add_order_joins_into_longer_axis(self):
+        chains = Chains({7: [1, 2], 8: [3, 4, 5]})
+        chains.add_order(3, 2)
+
+        assert chains.changed == {8}
+        assert chains.removed == {7}
+        assert chains[8] == [1, 2, 3, 4, 5]
+
+    def test_add_order_ignores_closed_chain(self):
+        chains = Chains({7: [1, 2]})
+        chains.add_order(1, 2)
+
+        assert not chains.changed
+        assert chains[7] == [1, 2]
+
+
+class TestDisjointSets:
+    def test_union(self):
+        sets: DisjointSets[int] = DisjointSets()
+        sets.union(1, 2)
+        sets.union(3, 4)
+        sets.union(2, -5)
+
+        assert sets.find(1) == sets.find(-5)
+        assert sets.find(3) == sets.find(4)
+        assert sets.find(1) != sets.find(3)
+        assert set(sets) == {1, 2, 3, 4, -5}
+
+
+class TestTopology:
+    def test_add_reorders_points(self):
+        topology = Topology()
+        topology.add(1, 2)
+        topology.add(3, 1)
+
+        assert not topology.conflict(3, 2)
+        assert topology.conflict(2, 3) == [3, 1, 2]
+
+    def test_add_rejects_cycle(self):
+        topology = Topology()
+        topology.add(1, 2)
+        topology.add(2, 3)
+
+        with raises(OrderConflict) as conflict:
+            topology.add(3, 1)
+
+        assert conflict.value.chain == [1, 2, 3]
+        assert not topology.conflict(1, 3)
+
+    def test_add_rejects_self_order(self):
+        with raises(OrderConflict):
+            Topology().add(1, 1)
@@ -0,0 +1,174 @@
+"""Tests `src.migrations`"""
+
+import sqlite3
+from contextlib import closing
+
+from pytest import fixture
+
+from src import migrations
+from src.archive import Archive
+from src.backends import SQLite
+from src.cells import ShortText
+from src.database import Database
+from src.migrations import MIGRATIONS, alter_online, update_in_chunks
+
+
+@fixture
+def path(tmp_path):
+    """Returns the path of an archive stored in SQLite, created at the latest version"""
+
+    path = str(tmp_path / 'archive.db')
+    archive = Archive(backend=SQLite(path))
+    archive.connect()
+    archive.new_category('Event')
+    archive.commit()
+    archive.close()
+
+    return path
+
+
+def _indexes(path: str) -> set[str]:
+    """
+    :param path: The archive's path
+    :return: The names of the archive's secondary indexes
+    """
+
+    with closing(sqlite3.connect(path)) as connection:
+        return {
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+                " AND name NOT LIKE 'sqlite_%'"
+            )
+        }
+
+
+def _versions(path: str) -> list[int]:
+    """
+    :param path: The archive's path
+    :return: The versions recorded in the archive
+    """
+
+    with closing(sqlite3.connect(path)) as connection:
+        return [
+            version
+            for (version,) in connection.execute('SELECT version FROM schema_version')
+        ]
+
+
+def _downgrade(path: str, version: int | None, *indexes: str) -> None:
+    """
+    Makes an archive look like one created by an older release
+    :param path: The archive's path
+    :param version: The version to record, or None for an archive without versioning
+    :param indexes: The indexes to drop
+    """
+
+    connection = sqlite3.connect(path)
+
+    with connection:
+        if version is None:
+            connection.execute('DROP TABLE schema_version')
+        else:
+            connection.execute('UPDATE schema_version SET version = ?', (version,))
+
+        for index in indexes:
+            connection.execute(f'DROP INDEX {index}')
+
+    connection.close()
+
+
+def _connect(path: str) -> Archive:
+    """
+    Connects to an archive, which migrates it
+    :param path: The archive's path
+    :return: The connected archive
+    """
+
+    archive = Archive(backend=SQLite(path))
+    archive.connect()
+    return archive
+
+
+def test_new_archive_starts_at_latest_version(path: str):
+    assert _versions(path) == [len(MIGRATIONS)]
+
+
+def test_migrate_from_version_0(path: str):
+    indexes = _indexes(path)
+    _downgrade(path, None, *indexes)
+
+    archive = _connect(path)
+
+    assert _versions(path) == [len(MIGRATIONS)]
+    assert _indexes(path) == indexes
+    assert [category['name'] for category in archive.get_categories()] == ['Event']
+    archive.close()
+
+
+def test_migrate_runs_only_missing_migrations(path: str):
+    _downgrade(path, 1, 'categories_name', 'documents_name', 'points_property_element')
+
+    _connect(path).close()
+
+    assert _versions(path) == [len(MIGRATIONS)]
+    assert {'categories_name', 'documents_name'} <= _indexes(path)
+    assert 'points_property_element' not in _indexes(path)
+
+
+def test_migrate_checks_every_axis_once(path: str):
+    archive = _connect(path)
+    archive.category(1).new_property('time')
+    archive.new_elements(archive.category(1), 2)
+    for name in ('Source', 'Other'):
+        archive.new_document(name).declare_order(archive.point(2), archive.point(1))
+    archive.commit()
+    archive.close()
+
+    # Earlier versions kept the touched axes in memory only
+    with closing(sqlite3.connect(path)) as connection, connection:
+        connection.execute('DROP TABLE touched_axes')
+    _downgrade(path, 2)
+
+    archive = _connect(path)
+    archive.analyze_rules()
+
+    assert archive.get_axes() == [1]
+    archive.close()
+
+
+def test_update_in_chunks_commits_each_chunk(path: str, monkeypatch):
+    monkeypatch.setattr(migrations, 'MIGRATION_CHUNK', 2)
+    database = Database(backend=SQLite(path))
+    database.connect()
+    database['categories'].insert_many(
+        ('name',), *((ShortText(f'Category {index}'),) for index in range(4))
+    ).execute()
+    database.commit()
+
+    update_in_chunks(database, 'categories', name='UPPER(name)')
+
+    assert not database.uncommitted
+    assert [row['name'] for row in database['categories'].select('name').execute()] == [
+        'EVENT',
+        *(f'CATEGORY {index}' for index in range(4)),
+    ]
+    assert (
+        database.profiler.summary()[
+            'UPDATE categories SET name = UPPER(name) WHERE id BETWEEN ? AND ?'
+        ]['calls']
+        == 3
+    )
+    database.close()
+
+
+def test_alter_online(path: str):
+    database = Database(backend=SQLite(path))
+    database.connect()
+
+    alter_online(database, 'categories', 'ADD COLUMN note TEXT')
+
+    assert database['categories'].select('id', 'note').execute() == [
+        {'id': 1, 'note': None}
+    ]
+    database.close()
@@ -0,0 +1,60 @@
+"""Tests `src.profiling`"""
+
+from logging import WARNING
+
+from src.profiling import Profiler, StatementStatistics, shape
+
+
+def test_shape_ignores_literals_and_list_lengths():
+    assert shape('SELECT id FROM points WHERE id IN (?, ?, ?) LIMIT 10') == (
+        'SELECT id FROM points WHERE id IN (?, ...) LIMIT ?'
+    )
+    assert shape("INSERT INTO axes (name) VALUES ('a'), ('b')") == (
+        'INSERT INTO axes (name) VALUES (?), ...'
+    )
+
+
+def test_percentile():
+    statistics = StatementStatistics()
+    statistics.durations.extend(range(1, 101))
+
+    assert statistics.percentile(0) == 1
+    assert statistics.percentile(0.5) == 51
+    assert statistics.percentile(1) == 100
+
+
+def test_profiler_groups_statements_by_shape():
+    profiler = Profiler()
+    profiler.record('SELECT id FROM points WHERE id = 1', (), 0.25, 1)
+    profiler.record('SELECT id FROM points WHERE id = 2', (), 0.5, 0)
+    profiler.record('SELECT id FROM axes', (), 2, 3)
+
+    summary = profiler.summary()
+
+    assert list(summary) == [
+        'SELECT id FROM axes',
+        'SELECT id FROM points WHERE id = ?',
+    ]
+    assert summary['SELECT id FROM points WHERE id = ?'] == {
+        'calls': 2,
+        'rows': 1,
+        'total': 0.75,
+        'p50': 0.5,
+        'p95': 0.5,
+        'p99': 0.5,
+    }
+
+    profiler.reset()
+
+    assert profiler.summary() == {}
+
+
+def test_profiler_logs_slow_statements_without_params(caplog):
+    profiler = Profiler(slow=1)
+
+    with caplog.at_level(WARNING):
+        profiler.record('SELECT id FROM points WHERE id = ?', ('secret',), 0.5, 1)
+        profiler.record('SELECT id FROM points WHERE id = ?', ('secret',), 2, 1)
+
+    assert len(caplog.records) == 1
+    assert 'secret' not in caplog.text
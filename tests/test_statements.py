@@ -0,0 +1,45 @@
+"""Tests `src.statements`"""
+
+from src.backends import Memory
+from src.cells import Axis, Point, UnsignedInt
+from src.database import Database
+from src.statements import LIST_PARAMS, compile_conditions
+
+
+def test_where_compiles_each_shape_once():
+    analysis = Database(backend=Memory())['analysis']
+    compile_conditions.cache_clear()
+
+    statements = [
+        analysis.select('id', 'value')
+        .where(axis=Axis(axis), value=range(0, 2**axis), point='!axis')
+        .limit(2)
+        for axis in (1, 2)
+    ]
+
+    assert [str(statement) for statement in statements] == [
+        'SELECT id, value FROM analysis'
+        ' WHERE axis = ? AND value BETWEEN ? AND ? AND point != axis LIMIT ?'
+    ] * 2
+    assert [statement._get_params() for statement in statements] == [
+        (1, 0, 1, 2),
+        (2, 0, 3, 2),
+    ]
+    assert compile_conditions.cache_info()[:2] == (1, 1)
+
+
+def test_where_compiles_lists_by_length():
+    analysis = Database(backend=Memory())['analysis']
+    points = tuple(Point(point) for point in range(LIST_PARAMS + 1))
+
+    assert str(analysis.select('id').where(point=points[:2])) == (
+        'SELECT id FROM analysis WHERE point IN (?, ?)'
+    )
+    assert str(
+        analysis.select('id').where_either(
+            {'point': points, 'value': UnsignedInt(0, negate=True)}
+        )
+    ) == (
+        'SELECT id FROM analysis WHERE (point IN (SELECT value FROM JSON_TABLE('
+        "?, '$[*]' COLUMNS (value BIGINT PATH '$')) AS list_values) AND value != ?)"
+    )